@@ -0,0 +1,67 @@
+# Dose adherence: every fired / done / snoozed occurrence is appended to reminder_occurrences, and the per-user
+# daily counters in adherence_daily are bumped in the same transaction. Reports read the counters only, so a
+# caregiver's months-long report costs one short primary-key range scan however many events are behind it.
+from backend.config import db
+from backend.models.adherence_model import ReminderOccurrence, AdherenceDaily
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from collections import defaultdict
+
+# Event kind -> rollup counter it feeds (REFIRED is logged but is not a new dose)
+COUNTERS = {"FIRED": "fired", "DONE": "done", "SNOOZED": "snoozed"}
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def event(r, kind, scheduled_for, occurred_at):
+    return {"user_id": r.user_id, "reminder_id": r.rid, "kind": kind,
+            "scheduled_for": scheduled_for, "occurred_at": occurred_at}
+
+
+def record(events):
+    """Append events (dicts from event()) and bump the daily rollups; the caller commits"""
+    if not events:
+        return
+    db.session.execute(insert(ReminderOccurrence), events)
+
+    deltas = defaultdict(lambda: {"fired": 0, "done": 0, "snoozed": 0})
+    for e in events:
+        counter = COUNTERS.get(e["kind"])
+        if counter:
+            deltas[(e["user_id"], e["scheduled_for"].date())][counter] += 1
+
+    upsert = _UPSERT_INSERTS[db.engine.dialect.name]
+    for (user_id, day), d in deltas.items():
+        stmt = upsert(AdherenceDaily).values(user_id=user_id, day=day, **d)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[AdherenceDaily.user_id, AdherenceDaily.day],
+            set_={name: getattr(AdherenceDaily, name) + getattr(stmt.excluded, name) for name in d},
+        ))
+
+
+def current_occurrence(r, at):
+    """The dose a done/snooze from the client refers to: the one that is due now, else the last one fired"""
+    if r.next_run_at and r.next_run_at <= at and r.is_on_schedule(r.next_run_at):
+        return r.next_run_at
+    last = db.session.query(ReminderOccurrence.scheduled_for).filter(
+        ReminderOccurrence.user_id == r.user_id,
+        ReminderOccurrence.reminder_id == r.rid,
+        ReminderOccurrence.kind == "FIRED",
+    ).order_by(ReminderOccurrence.occurred_at.desc()).limit(1).scalar()
+    return last or r.next_run_at or at
+
+
+def already_done(r, scheduled_for):
+    return db.session.query(ReminderOccurrence.id).filter_by(
+        user_id=r.user_id, reminder_id=r.rid, kind="DONE", scheduled_for=scheduled_for).first() is not None
+
+
+def report(user_id, first_day, last_day):
+    """Daily rows plus totals for [first_day, last_day]"""
+    rows = AdherenceDaily.query.filter(
+        AdherenceDaily.user_id == user_id,
+        AdherenceDaily.day >= first_day,
+        AdherenceDaily.day <= last_day,
+    ).order_by(AdherenceDaily.day).all()
+    totals = {name: sum(getattr(r, name) for r in rows) for name in ("fired", "done", "snoozed")}
+    totals["rate"] = round(totals["done"] / totals["fired"], 4) if totals["fired"] else None
+    return {"days": [r.to_json() for r in rows], "totals": totals}
@@ -0,0 +1,96 @@
+# Process-local cache for serialized list payloads (get_memory / get_reminder polling)
+from collections import OrderedDict
+from flask import jsonify
+from flask_login import current_user, login_required
+import threading, time
+
+
+class ListCache:
+    """Bounded LRU of per-user payloads with a TTL.
+
+    Entries are keyed by (user_id, user version, key); write paths call bump(user_id), which makes every
+    older entry for that user unreachable (they age out of the LRU). Readers take version(user_id) before they
+    query and hand it to put(), so a payload built while a write was being bumped is dropped, not stored.
+    The cache is per process, so with several workers another worker's entry can be up to `ttl` seconds stale -
+    keep the TTL short.
+    """
+
+    def __init__(self, max_entries=512, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # (user_id, version, key) -> (expires_at, value)
+        self._versions = {}             # user_id -> int
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.max_entries = int(app.config.get("LIST_CACHE_SIZE", self.max_entries))
+        self.ttl = float(app.config.get("LIST_CACHE_TTL", self.ttl))
+
+        @app.route("/api/cache_stats", methods=["GET"])
+        @login_required
+        def cache_stats():
+            # Operator view: debug mode, or an account listed in ADMIN_EMAILS
+            if not app.debug and (current_user.email or "").lower() not in app.config.get("ADMIN_EMAILS", ()):
+                return ("Not Found", 404)
+            return jsonify(self.stats()), 200
+
+    def get(self, user_id, key):
+        with self._lock:
+            full_key = (user_id, self._versions.get(user_id, 0), key)
+            entry = self._entries.get(full_key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[full_key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(full_key)
+            self.hits += 1
+            return entry[1]
+
+    def version(self, user_id):
+        """Current version for this user; read it before building a payload and pass it to put()"""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def put(self, user_id, key, value, version):
+        """Store value unless the user was bumped since `version` was read (the value may predate that write)"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._versions.get(user_id, 0) != version:
+                return
+            full_key = (user_id, version, key)
+            self._entries[full_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bump(self, user_id):
+        """Invalidate everything cached for this user (call after a successful commit)"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+list_cache = ListCache()
@@ -12,7 +12,8 @@ mail=Mail()
 db=SQLAlchemy()    # Create database object
 
 
-def create_app():
+def create_app(config=None):
+    """config: overrides applied after the defaults, before extensions bind (tests point the database elsewhere)"""
     app = Flask(__name__)
     CORS(app,supports_credentials=True)
     app.config['DEV_LOGIN_ENABLED'] = True  # Quick login for development
@@ -22,11 +23,15 @@ def create_app():
     from backend.routes import registration
     from backend.routes import quiz
     from backend.routes import profile
+    from backend.routes import voice_upload
+    from backend.routes import media
     memory.register(app)
     reminder.register(app)
     registration.register(app)
     quiz.register(app)
     profile.register(app)
+    voice_upload.register(app)
+    media.register(app)
 
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(app.instance_path, "mydatabase.db")}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -35,6 +40,8 @@ def create_app():
     os.makedirs(uploads_dir, exist_ok=True)
     app.config['UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'uploads')         # Create uploads directory under instance
     app.config["MAX_CONTENT_LENGTH"] = 10 * 1024 * 1024  # 10MB
+    app.config["VOICE_UPLOAD_MAX"] = 100 * 1024 * 1024  # Total size of a chunked voice upload (each chunk is still capped by MAX_CONTENT_LENGTH)
+    app.config["REMINDER_IMPORT_MAX"] = 64 * 1024 * 1024  # CSV/ICS body for /api/reminders/import (streamed, not buffered)
     app.config["ALLOWED_EXTENSIONS"] = {"png", "jpg", "jpeg", "gif", "webp","mp3","wav","ogg"}
 
     from dotenv import load_dotenv
@@ -42,6 +49,9 @@ def create_app():
 
     app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-change-me')
 
+    # Let a front server (Apache mod_xsendfile, lighttpd) send media bodies via the X-Sendfile header
+    app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "false").lower() in ("1", "true", "yes")
+
     login_manager = LoginManager()
     login_manager.init_app(app)
 
@@ -64,7 +74,7 @@ def create_app():
         # Default to Gmail; override the following two items to change provider
         "MAIL_SERVER": os.getenv("MAIL_SERVER", "smtp.gmail.com"),
         "MAIL_PORT": int(os.getenv("MAIL_PORT", "587")),
-        "MAIL_USE_TLS": True,
+        "MAIL_USE_TLS": os.getenv("MAIL_USE_TLS", "True").lower() in ("1", "true", "yes"),   # False for a local SMTP stand-in
         "MAIL_USERNAME": os.getenv("SENDER_EMAIL"),
         "MAIL_PASSWORD": os.getenv("SENDER_APP_PASSWORD"),
         "MAIL_DEFAULT_SENDER": os.getenv("SENDER_EMAIL"),
@@ -78,9 +88,45 @@ def create_app():
     })
     app.config['MAIL_ASCII_ATTACHMENTS'] = False
 
+    # Per-process LRU of list payloads (get_memory / get_reminder); see backend/cache.py
+    app.config['LIST_CACHE_SIZE'] = int(os.getenv("LIST_CACHE_SIZE", "512"))
+    app.config['LIST_CACHE_TTL'] = float(os.getenv("LIST_CACHE_TTL", "30"))
+    # Accounts allowed to read operator endpoints such as /api/cache_stats (comma-separated emails)
+    app.config['ADMIN_EMAILS'] = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+    # In-memory quiz question bank (backend/quiz_bank.py): how often other processes' writes are looked for
+    app.config['QUIZ_BANK_CHECK_SECONDS'] = float(os.getenv("QUIZ_BANK_CHECK_SECONDS", "30"))
+
+    # Image derivative pipeline (backend/media_derivatives.py): render processes, max queued renders
+    app.config['MEDIA_DERIVATIVE_WORKERS'] = int(os.getenv("MEDIA_DERIVATIVE_WORKERS", "2"))
+    app.config['MEDIA_DERIVATIVE_QUEUE'] = int(os.getenv("MEDIA_DERIVATIVE_QUEUE", "32"))
+
+    # Caregiver digests: > 0 groups reminder emails per recipient into one message per this many minutes
+    app.config['DIGEST_WINDOW_MINUTES'] = float(os.getenv("DIGEST_WINDOW_MINUTES", "0"))
+
+    # Reminder SSE stream (backend/events.py explains the threading model)
+    app.config['SSE_MAX_STREAMS'] = int(os.getenv("SSE_MAX_STREAMS", "200"))   # Open streams per process
+    app.config['SSE_TICK'] = float(os.getenv("SSE_TICK", "1"))                  # Watcher poll interval, seconds
+    app.config['SSE_KEEPALIVE'] = float(os.getenv("SSE_KEEPALIVE", "15"))       # Comment line to keep proxies open
+
+
+    if config:
+        app.config.update(config)
 
     mail.init_app(app)
 
+    from backend.cache import list_cache
+    list_cache.init_app(app)
+
+    from backend.quiz_bank import question_bank
+    question_bank.init_app(app)
+
+    from backend.events import reminder_events
+    reminder_events.init_app(app)
+
+    from backend.media_derivatives import derivative_pool
+    derivative_pool.init_app(app)
+
     db.init_app(app)      # Bind database and application
 
     migrate = Migrate(app, db)
@@ -0,0 +1,84 @@
+# Caregiver digests. With DIGEST_WINDOW_MINUTES > 0 the reminder dispatcher no longer queues one email per fired
+# reminder: it parks them in digest_items, and flush() renders ONE message per recipient covering everything that
+# fired for them (across all the patients they look after) and hands it to the email outbox.
+#
+# A recipient's digest goes out once their oldest waiting item is `window` old, so no reminder email is held back
+# longer than the window, and a caregiver gets at most one message per window instead of one per dose.
+from backend.config import db
+from backend.models.digest_model import DigestItem
+from backend.models.user_model import User
+from backend.notifications import enqueue
+from sqlalchemy import func, insert, or_, select, update
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
+
+LEASE = timedelta(minutes=5)            # A crashed worker's recipients become claimable again after this
+
+
+def collect(pairs, at):
+    """Park (reminder, recipient) pairs fired at local time `at`; the caller commits with the dispatch"""
+    rows = [{"recipient": to.lower(), "user_id": r.user_id, "reminder_id": r.rid, "title": r.title,
+             "description": r.description, "due_at": r.next_run_at or at, "queued_at": at,
+             "claimed_by": None, "claimed_until": None}
+            for r, to in pairs]
+    if rows:
+        db.session.execute(insert(DigestItem), rows)
+
+
+def _claimable(at):
+    return or_(DigestItem.claimed_until.is_(None), DigestItem.claimed_until < at)
+
+
+def claim_ripe(worker_id, at, window, limit):
+    """Lease all waiting items of up to `limit` recipients whose oldest item is at least `window` old"""
+    lease_until = at + LEASE
+    ripe = select(DigestItem.recipient).where(_claimable(at)).group_by(DigestItem.recipient) \
+        .having(func.min(DigestItem.queued_at) <= at - window).limit(limit)
+    db.session.execute(
+        update(DigestItem)
+        .where(DigestItem.recipient.in_(ripe.scalar_subquery()), _claimable(at))
+        .values(claimed_by=worker_id, claimed_until=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return DigestItem.query.filter_by(claimed_by=worker_id, claimed_until=lease_until) \
+        .order_by(DigestItem.recipient, DigestItem.user_id, DigestItem.due_at, DigestItem.id).all()
+
+
+def render(items, patients):
+    """One recipient's items (sorted by patient, due_at) -> (subject, body)"""
+    if len(items) == 1:
+        subject = f"[Reminder] {items[0].title or 'Nontitle'}"
+    else:
+        subject = f"[Reminders] {len(items)} reminders"
+    sections = []
+    for user_id, group in groupby(items, key=attrgetter("user_id")):
+        lines = [f"For {patients.get(user_id, 'your patient')}:"]
+        for item in group:
+            line = f"  {item.due_at:%Y-%m-%d %H:%M}  {item.title}"
+            if item.description:
+                line += f" — {item.description}"
+            lines.append(line)
+        sections.append("\n".join(lines))
+    return subject, "\n\n".join(sections)
+
+
+def flush(worker_id, at, window, limit=200):
+    """Render and queue the digests that are due; returns how many were queued"""
+    items = claim_ripe(worker_id, at, window, limit)
+    if not items:
+        return 0
+
+    patients = {uid: name or email for uid, name, email in db.session.query(User.id, User.name, User.email)
+                .filter(User.id.in_({i.user_id for i in items}))}
+    sent = 0
+    for recipient, group in groupby(items, key=attrgetter("recipient")):
+        subject, body = render(list(group), patients)
+        enqueue([recipient], subject, body, kind="digest")
+        sent += 1
+
+    # Queue and consume in one transaction: every item ends up in exactly one digest
+    DigestItem.query.filter(DigestItem.id.in_([i.id for i in items])).delete(synchronize_session=False)
+    db.session.commit()
+    return sent
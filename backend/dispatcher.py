@@ -0,0 +1,127 @@
+# Background reminder dispatcher: fires due reminders without anyone calling /api/test_send_email/<rid>.
+#
+# Loop per worker: claim a batch of due rows (one UPDATE on the (is_active, next_run_at) index), queue the
+# server-side channels (email goes to the outbox, delivered by backend/outbox.py), then write
+# next_run_at/last_sent_at back for the whole batch with one executemany, in the same transaction as the queued
+# messages. Several worker processes may run against the same database: a row is only ever leased to one of them.
+#
+# Run: python -m backend.scripts.reminder_dispatcher
+from backend.config import db
+from backend.models.reminder_model import Reminder
+from backend.notifications import enqueue_reminder
+from backend import adherence, digest
+from sqlalchemy import and_, or_, select, update
+from datetime import datetime, timedelta
+import os, socket, time, uuid
+
+SERVER_CHANNELS = {"email"}             # "alarm" and friends are rendered by the clients
+LEASE = timedelta(minutes=5)            # A crashed worker's rows become claimable again after this
+
+
+def now():
+    # scheduled_at/next_run_at hold the wall-clock time picked in the frontend (naive), so compare in local time
+    return datetime.now()
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _claimable(at):
+    return and_(
+        Reminder.is_active.is_(True),
+        Reminder.next_run_at <= at,
+        or_(Reminder.claimed_until.is_(None), Reminder.claimed_until < at),
+    )
+
+
+def claim_due(worker_id, at, limit):
+    """Lease up to `limit` due reminders to this worker and return them.
+
+    The due ids are read from the (is_active, next_run_at) index first; the UPDATE and the read-back then only
+    touch those primary keys, so no statement scans the table. The claimable condition is repeated in the
+    UPDATE: a row another worker leased in between is skipped, and the read-back keeps only our own lease.
+    """
+    lease_until = at + LEASE
+    due = db.session.execute(select(Reminder.rid).where(_claimable(at))
+                             .order_by(Reminder.next_run_at).limit(limit)).scalars().all()
+    if not due:
+        db.session.commit()
+        return []
+    db.session.execute(
+        update(Reminder)
+        .where(Reminder.rid.in_(due), _claimable(at))
+        .values(claimed_by=worker_id, claimed_until=lease_until,
+                updated_at=Reminder.updated_at)     # A lease is not an edit: keep onupdate away
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return Reminder.query.filter(Reminder.rid.in_(due), Reminder.claimed_by == worker_id,
+                                 Reminder.claimed_until == lease_until).all()
+
+
+def _recipient(r):
+    return (r.recipient_email or os.getenv("DEFAULT_RECIPIENT") or "").strip()
+
+
+def digest_window(app):
+    minutes = app.config.get("DIGEST_WINDOW_MINUTES", 0)
+    return timedelta(minutes=minutes) if minutes else None
+
+
+def enqueue(app, reminders, at):
+    """Queue every server-side channel of the batch; the outbox worker does the (retried) sending.
+    In digest mode emails are parked per recipient and go out grouped (backend/digest.py)."""
+    emails = [(r, _recipient(r)) for r in reminders if "email" in (r.channels or []) and _recipient(r)]
+    if digest_window(app):
+        digest.collect(emails, at)
+    else:
+        for r, to in emails:
+            enqueue_reminder(r, to)
+
+
+def dispatch_once(app, worker_id, batch_size=500):
+    """Claim, queue and advance one batch; returns the number of reminders processed"""
+    at = now()
+    reminders = claim_due(worker_id, at, batch_size)
+    if not reminders:
+        return 0
+
+    enqueue(app, reminders, at)
+    adherence.record([adherence.event(r, "FIRED" if r.is_on_schedule(r.next_run_at) else "REFIRED",
+                                      r.next_run_at, at) for r in reminders])
+    stamp = datetime.utcnow()
+    rows = []
+    for r in reminders:
+        row = {"rid": r.rid, "claimed_by": None, "claimed_until": None, "updated_at": stamp,
+               "next_run_at": r.next_occurrence_after(at)}     # None: one-shot reminder is done
+        if SERVER_CHANNELS & set(r.channels or []):
+            row["last_sent_at"] = stamp
+        rows.append(row)
+
+    db.session.flush()                              # Pending INSERTs go out before the identity map is dropped
+    db.session.expunge_all()
+    # ORM bulk UPDATE by primary key -> one executemany. Only rows still under our lease: an edit made while we
+    # held it (update_reminder drops the lease) keeps its schedule instead of being overwritten with ours.
+    mine = update(Reminder).where(Reminder.claimed_by == worker_id, Reminder.claimed_until == at + LEASE)
+    db.session.execute(mine.execution_options(synchronize_session=None), rows)   # Identity map is empty anyway
+    db.session.commit()                             # Advance and queue atomically: no lost or doubled emails
+    return len(reminders)
+
+
+def run(app, worker_id=None, batch_size=500, poll_interval=5.0, once=False):
+    """Work through everything that is due, then poll; returns the total processed when once=True"""
+    worker_id = worker_id or default_worker_id()
+    total = 0
+    with app.app_context():
+        app.logger.info("reminder dispatcher %s started", worker_id)
+        window = digest_window(app)
+        while True:
+            n = dispatch_once(app, worker_id, batch_size)
+            total += n
+            if window:
+                digest.flush(worker_id, now(), window)
+            if n < batch_size:          # Backlog drained
+                if once:
+                    return total
+                time.sleep(poll_interval)
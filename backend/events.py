@@ -0,0 +1,171 @@
+# Server-Sent Events hub for reminder alarms (GET /api/reminders/stream).
+#
+# Concurrency model
+# -----------------
+# * One watcher thread per web process polls the database once per SSE_TICK seconds for ALL open streams:
+#     - look-ahead: active reminders whose next_run_at falls in the next LOOKAHEAD window (index on
+#       is_active, next_run_at) go into an in-memory heap and are pushed as "due" when their time arrives;
+#     - changes: rows whose updated_at moved since the last tick (index on updated_at) are pushed as "updated"
+#       (snooze/done through update_reminder, dispatcher advancing next_run_at, edits from any process).
+#       updated_at is stamped before the writer commits, so a row can become visible with a stamp older than
+#       one already seen: every poll re-reads the last CHANGE_OVERLAP and drops (rid, updated_at) pairs it has
+#       already pushed.
+#   Both queries only ask for the users with an open stream; a user who connects gets their own look-ahead on
+#   the next tick. Database load is therefore O(events) per tick, independent of how many clients are connected.
+#   With no stream open the thread waits on a condition instead of polling, and starts afresh on the next one.
+# * Each open stream costs one queue and, on a threaded server, one blocked request thread (woken by an event
+#   or by the keep-alive every SSE_KEEPALIVE seconds). A gthread worker can hold at most --threads streams;
+#   under gevent/eventlet a stream is a greenlet and one worker holds thousands. SSE_MAX_STREAMS caps the
+#   streams per process; extra clients get 503 and fall back to polling /api/get_reminder.
+from backend.models.reminder_model import Reminder
+from datetime import datetime, timedelta
+import heapq, itertools, queue, threading, time
+
+LOOKAHEAD = timedelta(seconds=30)
+CHANGE_OVERLAP = timedelta(seconds=5)     # Longest expected gap between stamping updated_at and committing
+
+
+class ReminderEvents:
+    def __init__(self, tick=1.0, max_streams=200):
+        self.tick = tick
+        self.max_streams = max_streams
+        self._app = None
+        self._subs = {}                 # user_id -> set(queue.Queue)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)    # Signalled when the first stream opens
+        self._thread = None
+        self._new_users = set()         # Subscribed since the last look-ahead: their scanned window is not loaded
+        self._heap = []                 # (fire_at, seq, rid, user_id, payload)
+        self._scheduled = {}            # rid -> seq of its live heap entry; any other entry for it is stale
+        self._seq = itertools.count()
+        self._horizon = None            # next_run_at scanned up to here (local wall clock)
+        self._changes_since = None      # updated_at scanned up to here (UTC)
+        self._pushed = set()            # (rid, updated_at) already pushed inside the overlap window
+
+    def init_app(self, app):
+        self._app = app
+        self.tick = float(app.config.get("SSE_TICK", self.tick))
+        self.max_streams = int(app.config.get("SSE_MAX_STREAMS", self.max_streams))
+
+    # -- subscribers ------------------------------------------------------------------------------------------
+    def subscribe(self, user_id):
+        """New queue for one stream, or None when the per-process cap is reached"""
+        with self._lock:
+            if sum(len(qs) for qs in self._subs.values()) >= self.max_streams:
+                return None
+            q = queue.Queue(maxsize=100)
+            if user_id not in self._subs:
+                self._new_users.add(user_id)
+            self._subs.setdefault(user_id, set()).add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reminder-events", daemon=True)
+                self._thread.start()
+            self._wake.notify()
+            return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            qs = self._subs.get(user_id)
+            if qs:
+                qs.discard(q)
+                if not qs:
+                    del self._subs[user_id]
+
+    def stream_count(self):
+        with self._lock:
+            return sum(len(qs) for qs in self._subs.values())
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            targets = list(self._subs.get(user_id, ()))
+        for q in targets:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                pass        # Client is not reading; it resyncs from /api/get_reminder on reconnect
+
+    # -- watcher ----------------------------------------------------------------------------------------------
+    def _run(self):
+        from backend.config import db
+        from backend.dispatcher import now
+        with self._app.app_context():
+            while True:
+                with self._lock:
+                    if not self._subs:
+                        self._reset()
+                        while not self._subs:
+                            self._wake.wait()
+                try:
+                    self._poll(now())
+                except Exception:
+                    self._app.logger.exception("reminder_events_poll_failed")
+                finally:
+                    db.session.remove()
+                time.sleep(self.tick)
+
+    def _reset(self):
+        """Forget the window state; the next poll starts from now (caller holds the lock)"""
+        self._heap.clear()
+        self._scheduled.clear()
+        self._pushed.clear()
+        self._new_users.clear()
+        self._horizon = self._changes_since = None
+
+    def _schedule(self, r):
+        seq = next(self._seq)
+        self._scheduled[r.rid] = seq
+        heapq.heappush(self._heap, (r.next_run_at, seq, r.rid, r.user_id, r.to_json()))
+
+    def _poll(self, at):
+        if self._horizon is None:
+            self._horizon = at
+            self._changes_since = datetime.utcnow()
+        with self._lock:
+            users = set(self._subs)
+            new_users, self._new_users = self._new_users & users, set()
+        if not users:
+            return
+
+        # Look ahead: everything that becomes due before the new horizon; users who just connected also need the
+        # part of the window that was scanned before they were subscribed
+        horizon = at + LOOKAHEAD
+        due = [Reminder.query.filter(Reminder.is_active.is_(True), Reminder.user_id.in_(users),
+                                     Reminder.next_run_at > self._horizon, Reminder.next_run_at <= horizon)]
+        if new_users:
+            for _, seq, rid, user_id, _ in self._heap:
+                if user_id in new_users and self._scheduled.get(rid) == seq:
+                    del self._scheduled[rid]        # Queued before they left; may be stale now
+            due.append(Reminder.query.filter(Reminder.is_active.is_(True), Reminder.user_id.in_(new_users),
+                                             Reminder.next_run_at > at, Reminder.next_run_at <= self._horizon))
+        for q in due:
+            for r in q.all():
+                self._schedule(r)
+        self._horizon = horizon
+
+        # Fire (before looking at changes: the dispatcher may already have moved next_run_at past this moment)
+        while self._heap and self._heap[0][0] <= at:
+            fire_at, seq, rid, user_id, payload = heapq.heappop(self._heap)
+            if self._scheduled.get(rid) != seq:
+                continue            # Rescheduled, edited or deactivated after it was queued
+            del self._scheduled[rid]
+            if user_id in users:
+                self.publish(user_id, "due", payload)
+
+        # Changes since the last tick (snooze/done, edits, dispatcher advancing next_run_at)
+        since = self._changes_since - CHANGE_OVERLAP
+        changed = Reminder.query.filter(Reminder.updated_at > since, Reminder.user_id.in_(users)) \
+            .order_by(Reminder.updated_at).all()
+        self._pushed = {key for key in self._pushed if key[1] > since}
+        for r in changed:
+            if (r.rid, r.updated_at) in self._pushed:
+                continue
+            self._pushed.add((r.rid, r.updated_at))
+            self._changes_since = max(self._changes_since, r.updated_at)
+            self.publish(r.user_id, "updated", r.to_json())
+            if r.is_active and r.next_run_at and at < r.next_run_at <= self._horizon:
+                self._schedule(r)       # Fresh payload, and covers moves into an already scanned window
+            else:
+                self._scheduled.pop(r.rid, None)
+
+
+reminder_events = ReminderEvents()
@@ -0,0 +1,146 @@
+# Downscaled, re-encoded copies of uploaded images for low-end tablets.
+#
+# For a stored image cas/ab/cd/<sha>.<ext> the pipeline writes cas/derived/ab/cd/<sha>.thumb.jpg and
+# <sha>.display.jpg (long edge SIZES[...] px, never upscaled) and records {content id: {size: rel path}} in
+# Reminder.media_derivatives of the reminder it was uploaded to; the batch command syncs every other reminder.
+#
+# Rendering runs in a bounded process pool (spawned, so it never forks the threaded web server) and never on the
+# request thread. Output names depend only on the content id, so a submit for an image that is already done costs
+# a few stat calls; when the pool is saturated the upload simply goes without and the batch command
+# (python -m backend.scripts.build_media_derivatives) fills the gap later.
+from backend.config import db
+from backend.models.reminder_model import Reminder
+from backend import media_store
+from backend.cache import list_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import multiprocessing, os, threading
+
+try:
+    from PIL import Image, ImageOps     # Optional: without Pillow originals are served as they are
+except ImportError:
+    Image = None
+
+SIZES = {"thumb": 256, "display": 1280}
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+JPEG_QUALITY = 82
+
+
+def derived_rel_path(content_id, size):
+    return f"cas/derived/{content_id[:2]}/{content_id[2:4]}/{content_id}.{size}.jpg"
+
+
+def render(src_path, upload_root, content_id):
+    """Write the missing derivatives of one image -> {size: rel path}. Runs in a pool worker; no database."""
+    out, todo = {}, {}
+    for size, edge in SIZES.items():
+        rel = derived_rel_path(content_id, size)
+        out[size] = rel
+        if not os.path.exists(os.path.join(upload_root, *rel.split("/"))):
+            todo[size] = edge
+    if not todo:
+        return out
+
+    with Image.open(src_path) as im:
+        im.draft("RGB", (max(todo.values()),) * 2)     # JPEG: let the decoder downscale while reading
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            rgba = im.convert("RGBA")
+            im = Image.new("RGB", rgba.size, (255, 255, 255))
+            im.paste(rgba, mask=rgba.getchannel("A"))
+        for size, edge in sorted(todo.items(), key=lambda kv: -kv[1]):
+            im.thumbnail((edge, edge), Image.LANCZOS)     # Largest first, each step shrinks the working copy
+            path = os.path.join(upload_root, *out[size].split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            im.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp, path)       # Readers never see a half-written file
+    return out
+
+
+def is_image(blob):
+    return Image is not None and blob.ext.lower() in IMAGE_EXTS
+
+
+def attach(content_id, derivatives, rids):
+    """Record derivatives on the given reminders (the uploads that queued the render) -> affected user ids;
+    caller commits. A primary-key lookup, not a search of every media_paths: other reminders that reference the
+    same image were attached when they uploaded it, or by the batch command."""
+    reminders = Reminder.query.filter(Reminder.rid.in_(rids)).all()
+    for r in reminders:
+        if content_id not in (r.media_paths or []):
+            continue                    # Detached again while the render ran
+        if (r.media_derivatives or {}).get(content_id) != derivatives:
+            r.media_derivatives = {**(r.media_derivatives or {}), content_id: derivatives}
+            r.updated_at = datetime.utcnow()
+    return {r.user_id for r in reminders}
+
+
+class DerivativePool:
+    def __init__(self, workers=2, max_pending=32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._app = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self.workers = int(app.config.get("MEDIA_DERIVATIVE_WORKERS", self.workers))
+        self.max_pending = int(app.config.get("MEDIA_DERIVATIVE_QUEUE", self.max_pending))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def submit(self, blob, rid):
+        """Queue derivatives for a blob just attached to reminder rid; False when it is not an image or the pool
+        is saturated"""
+        if not is_image(blob) or not self._slots.acquire(blocking=False):
+            return False
+        upload_root = self._app.config.get("UPLOAD_FOLDER", "uploads")
+        try:
+            future = self.executor().submit(render, media_store.blob_path(upload_root, blob), upload_root,
+                                            blob.sha256)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset()
+            return False
+        except Exception:             # The upload itself must not fail; the batch command catches up
+            self._slots.release()
+            self._app.logger.exception("media derivatives not queued for %s", blob.sha256)
+            return False
+        content_id = blob.sha256
+        future.add_done_callback(lambda f: self._finished(content_id, rid, f))
+        return True
+
+    def _finished(self, content_id, rid, future):
+        # Runs on the executor's management thread of this web process
+        self._slots.release()
+        try:
+            derivatives = future.result()
+            with self._app.app_context():
+                users = attach(content_id, derivatives, [rid])
+                db.session.commit()
+            for user_id in users:
+                list_cache.bump(user_id)
+        except BrokenProcessPool:
+            self._app.logger.exception("media derivatives pool died while rendering %s", content_id)
+            self._reset()
+        except Exception:
+            self._app.logger.exception("media derivatives failed for %s", content_id)
+
+    def _reset(self):
+        """A worker died and took the pool with it: start a fresh one on the next submit"""
+        with self._lock:
+            broken, self._executor = self._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+
+derivative_pool = DerivativePool()
@@ -0,0 +1,280 @@
+# Garbage collection for UPLOAD_FOLDER: removes files nothing in the database points at any more.
+#
+#   cas/ab/cd/<sha><ext>              blob     live while its media_blobs row has ref_count > 0
+#   cas/derived/ab/cd/<sha>.<size>.jpg derived  live while the blob above is live
+#   cas/tmp/<uuid>                    tmp      upload spool leftovers, never live
+#   cas/trash/<name>                  tmp      blob files a GC pass was interrupted while removing, never live
+#   partial/<upload id>.part          partial  live while its upload session is OPEN or FINALIZING
+#   <name> (top level)                file     live while Memories.voice_file_path or a legacy Reminder.media_paths
+#                                              entry names it
+# Anything else is reported and left alone. Files younger than `min_age` are never touched, which covers uploads
+# between writing the file and committing the row that references it.
+#
+# Memory stays bounded whatever the size of the tree: the scan is streamed into a temporary table in `batch_size`
+# inserts, references from memories/reminders are staged the same way, and orphans are found with anti-joins in
+# the database and read back one keyset page at a time.
+from backend.config import db
+from backend.models.media_model import MediaBlob
+from backend.models.memory_model import Memories
+from backend.models.reminder_model import Reminder
+from backend.models.upload_model import UploadSession
+from backend import media_store
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, and_, delete, exists, insert, or_, select
+from datetime import datetime, timedelta
+import os, re, time
+
+KINDS = ("blob", "derived", "tmp", "partial", "file", "other")
+_BLOB_RE = re.compile(r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[^/]*)?$")
+_DERIVED_RE = re.compile(r"^cas/derived/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z]+\.jpg$")
+
+_meta = MetaData()
+scanned_files = Table(
+    "media_gc_files", _meta,
+    Column("id", Integer, primary_key=True),
+    Column("rel_path", String, nullable=False),
+    Column("kind", String(10), nullable=False),
+    Column("key", String, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("mtime", Float, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+file_refs = Table(
+    "media_gc_refs", _meta,
+    Column("key", String, nullable=False, index=True),
+    prefixes=["TEMPORARY"],
+)
+
+
+def classify(rel):
+    """Store-relative path ('/'-separated) -> (kind, key the references are matched on)"""
+    m = _BLOB_RE.match(rel)
+    if m:
+        return "blob", m.group(1)
+    m = _DERIVED_RE.match(rel)
+    if m:
+        return "derived", m.group(1)
+    if rel.startswith(("cas/tmp/", "cas/trash/")) and rel.count("/") == 2:
+        return "tmp", rel
+    if rel.startswith("partial/") and rel.endswith(".part") and rel.count("/") == 1:
+        return "partial", rel[len("partial/"):-len(".part")]
+    if "/" not in rel:
+        return "file", rel
+    return "other", rel
+
+
+def ref_key(path):
+    """A path stored in the database -> the key of the top-level file it names. Matched on the file name alone,
+    so references written under an older instance path still protect their file."""
+    return os.path.basename(os.path.normpath(path))
+
+
+def walk(upload_root):
+    """Yield (rel path, size, mtime) for every regular file below upload_root; one directory open at a time"""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            it = os.scandir(os.path.join(upload_root, *rel_dir.split("/")) if rel_dir else upload_root)
+        except OSError:
+            continue                    # Removed while we were walking
+        with it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(rel)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        yield rel, st.st_size, st.st_mtime
+                except OSError:
+                    continue
+
+
+def _keyset(conn, pk, columns, where, batch_size):
+    """Yield rows of `columns` one page at a time, ordered by the integer primary key pk"""
+    last = None
+    while True:
+        stmt = select(pk, *columns).where(where).order_by(pk).limit(batch_size)
+        if last is not None:
+            stmt = stmt.where(pk > last)
+        rows = conn.execute(stmt).all()
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+
+
+def _stage_files(conn, upload_root, batch_size, report):
+    batch = []
+    for rel, size, mtime in walk(upload_root):
+        kind, key = classify(rel)
+        report["scanned"][kind][0] += 1
+        report["scanned"][kind][1] += size
+        if kind != "other":
+            batch.append({"rel_path": rel, "kind": kind, "key": key, "size": size, "mtime": mtime})
+        if len(batch) >= batch_size:
+            conn.execute(insert(scanned_files), batch)
+            conn.commit()
+            batch.clear()
+    if batch:
+        conn.execute(insert(scanned_files), batch)
+        conn.commit()
+
+
+def _stage_refs(conn, batch_size):
+    """Names of top-level files that memories and legacy reminder attachments point at"""
+    def flush(keys):
+        if keys:
+            conn.execute(insert(file_refs), [{"key": k} for k in keys])
+            conn.commit()
+            keys.clear()
+
+    keys = []
+    for row in _keyset(conn, Memories.id, [Memories.voice_file_path], Memories.voice_file_path.isnot(None),
+                       batch_size):
+        keys.append(ref_key(row.voice_file_path))
+        if len(keys) >= batch_size:
+            flush(keys)
+    for row in _keyset(conn, Reminder.rid, [Reminder.media_paths], Reminder.media_paths.isnot(None), batch_size):
+        keys.extend(ref_key(p) for p in row.media_paths or []
+                    if isinstance(p, str) and p and not media_store.is_content_id(p))
+        if len(keys) >= batch_size:
+            flush(keys)
+    flush(keys)
+
+
+def _blob_live(key, cutoff):
+    return exists().where(MediaBlob.sha256 == key,
+                          or_(MediaBlob.ref_count > 0, MediaBlob.created_at >= cutoff))
+
+
+def _orphaned(cutoff_ts, blob_cutoff):
+    f = scanned_files.c
+    live = or_(
+        and_(f.kind.in_(("blob", "derived")), _blob_live(f.key, blob_cutoff)),
+        and_(f.kind == "partial", exists().where(UploadSession.id == f.key,
+                                                 UploadSession.status.in_(("OPEN", "FINALIZING")))),
+        and_(f.kind == "file", exists().where(file_refs.c.key == f.key)),
+    )
+    return and_(f.mtime < cutoff_ts, ~live)
+
+
+def _remove_blob(conn, upload_root, row, cutoff, cutoff_ts):
+    """Drop an unreferenced blob's row and file together -> (row removed, file removed).
+
+    The row is deleted first (re-checked inside the DELETE, so a blob that picked up a reference since the scan
+    keeps both). The file is then renamed into cas/trash before the final check: an upload of the same content
+    renames a fresh file onto the blob path and inserts the row afterwards, so a fresh mtime on the moved file
+    or a row that reappeared means it belongs to that upload and goes back."""
+    sha, path = row.key, os.path.join(upload_root, *row.rel_path.split("/"))
+    removed = conn.execute(delete(MediaBlob).where(MediaBlob.sha256 == sha, MediaBlob.ref_count == 0,
+                                                   MediaBlob.created_at < cutoff)).rowcount
+    conn.commit()
+    if conn.execute(select(MediaBlob.sha256).where(MediaBlob.sha256 == sha)).first():
+        conn.rollback()
+        return bool(removed), False
+    trash = os.path.join(upload_root, "cas", "trash")
+    os.makedirs(trash, exist_ok=True)
+    moved = os.path.join(trash, f"{os.path.basename(path)}.{os.getpid()}")
+    try:
+        os.replace(path, moved)
+    except FileNotFoundError:
+        return bool(removed), False
+    revived = os.stat(moved).st_mtime >= cutoff_ts or \
+        conn.execute(select(MediaBlob.sha256).where(MediaBlob.sha256 == sha)).first() is not None
+    conn.rollback()
+    if revived and not os.path.exists(path):
+        os.replace(moved, path)
+        return bool(removed), False
+    os.remove(moved)        # Not revived, or a newer copy of the same bytes is already back in place
+    return bool(removed), not revived
+
+
+def collect(upload_root, min_age=timedelta(hours=24), dry_run=False, batch_size=1000, rate=0.0):
+    """One GC pass -> report dict. rate: max files deleted per second (0 = unlimited)."""
+    report = {
+        "dry_run": dry_run,
+        "scanned": {k: [0, 0] for k in KINDS},          # kind -> [files, bytes]
+        "orphaned": {k: [0, 0] for k in KINDS},
+        "deleted": 0, "freed_bytes": 0, "errors": 0, "blob_rows_removed": 0,
+    }
+    cutoff = datetime.utcnow() - min_age
+    cutoff_ts = time.time() - min_age.total_seconds()
+    started = time.monotonic()
+
+    with db.engine.connect() as conn:
+        _meta.create_all(conn)
+        try:
+            _stage_files(conn, upload_root, batch_size, report)
+            _stage_refs(conn, batch_size)
+
+            f = scanned_files.c
+            for page in _pages(_keyset(conn, f.id, [f.rel_path, f.kind, f.key, f.size],
+                                       _orphaned(cutoff_ts, cutoff), batch_size), batch_size):
+                for row in page:
+                    report["orphaned"][row.kind][0] += 1
+                    report["orphaned"][row.kind][1] += row.size
+                if dry_run:
+                    continue
+                for row in page:
+                    try:
+                        if row.kind == "blob":
+                            # Row and file per item, right before the unlink: --rate can space items out by
+                            # seconds, and a page-wide row delete would leave that long a window for a re-upload
+                            row_removed, file_removed = _remove_blob(conn, upload_root, row, cutoff, cutoff_ts)
+                            report["blob_rows_removed"] += row_removed
+                            if not file_removed:
+                                continue
+                        else:
+                            os.remove(os.path.join(upload_root, *row.rel_path.split("/")))
+                        report["deleted"] += 1
+                        report["freed_bytes"] += row.size
+                    except FileNotFoundError:
+                        pass
+                    except OSError:
+                        report["errors"] += 1
+                    if rate:
+                        # Pace deletes so a large backlog doesn't saturate the disk the web server reads from
+                        delay = started + report["deleted"] / rate - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+
+            # Unreferenced rows whose file was already gone
+            stale = and_(MediaBlob.ref_count == 0, MediaBlob.created_at < cutoff)
+            if dry_run:
+                report["blob_rows_removed"] = conn.execute(
+                    select(db.func.count()).select_from(MediaBlob).where(stale)).scalar()
+            else:
+                report["blob_rows_removed"] += conn.execute(delete(MediaBlob).where(stale)).rowcount
+                conn.commit()
+        finally:
+            conn.rollback()
+            _meta.drop_all(conn)
+            conn.commit()
+    return report
+
+
+def _pages(rows, size):
+    page = []
+    for row in rows:
+        page.append(row)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def format_report(report):
+    lines = [f"{'kind':8} {'scanned':>10} {'bytes':>14} {'orphaned':>10} {'bytes':>14}"]
+    for kind in KINDS:
+        s, o = report["scanned"][kind], report["orphaned"][kind]
+        if s[0] or o[0]:
+            lines.append(f"{kind:8} {s[0]:>10} {s[1]:>14} {o[0]:>10} {o[1]:>14}")
+    verb = "would be removed" if report["dry_run"] else "removed"
+    lines.append(f"{sum(o[0] for o in report['orphaned'].values())} orphaned files "
+                 f"({sum(o[1] for o in report['orphaned'].values())} bytes) {verb}"
+                 + ("" if report["dry_run"] else f"; {report['deleted']} deleted, {report['freed_bytes']} bytes "
+                                                 f"freed, {report['errors']} errors")
+                 + f"; {report['blob_rows_removed']} unreferenced blob rows {verb}.")
+    return "\n".join(lines)
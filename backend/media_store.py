@@ -0,0 +1,115 @@
+# Content-addressed store for uploaded media: UPLOAD_FOLDER/cas/ab/cd/<sha256><ext>, one file per distinct content.
+# Reference counts live in media_blobs; Reminder.media_paths holds content ids (sha256 hex).
+from backend.config import db
+from backend.models.media_model import MediaBlob
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+import hashlib, os, re, uuid
+
+COPY_BUFSIZE = 64 * 1024
+AUDIO_EXTS = {".mp3", ".wav", ".ogg"}
+_CONTENT_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def is_content_id(ref):
+    """media_paths may still hold absolute paths written before the store existed"""
+    return isinstance(ref, str) and bool(_CONTENT_ID_RE.match(ref))
+
+
+def blob_path(upload_root, blob):
+    return os.path.join(upload_root, *blob.rel_path.split("/"))
+
+
+def _spool(stream, upload_root):
+    """Copy the stream to a temp file while hashing it; never holds more than one block in memory"""
+    tmp_dir = os.path.join(upload_root, "cas", "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, "wb") as out:
+        while True:
+            block = stream.read(COPY_BUFSIZE)
+            if not block:
+                break
+            digest.update(block)
+            out.write(block)
+            size += len(block)
+    return digest.hexdigest(), size, tmp_path
+
+
+def store(stream, ext, upload_root):
+    """Stream an upload into the store -> (blob, created); created is False when the content was already stored.
+
+    The spooled file is always renamed onto the content's path: identical bytes replace identical bytes, so a
+    concurrent upload of the same content or a GC pass that just removed the file can't leave the row pointing
+    at nothing. Nothing here ever deletes the final path. The row itself is written by add_ref, which the caller
+    commits; if that fails the file is left for the media GC.
+    """
+    sha, size, tmp_path = _spool(stream, upload_root)
+    blob = db.session.get(MediaBlob, sha)
+    created = blob is None
+    if created:
+        blob = MediaBlob(sha256=sha, ext=ext, size=size, ref_count=0)     # Not added: add_ref inserts the row
+    final_path = blob_path(upload_root, blob)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    try:
+        os.replace(tmp_path, final_path)        # Same filesystem -> atomic rename
+    except OSError:
+        os.remove(tmp_path)
+        raise
+    return blob, created
+
+
+def add_ref(blob):
+    """Take one reference on a blob from store(); inserts its row if there is none (a new upload, or the media
+    GC removed the unreferenced row since store() looked). Caller commits."""
+    upsert = _UPSERT_INSERTS[db.engine.dialect.name]
+    stmt = upsert(MediaBlob).values(sha256=blob.sha256, ext=blob.ext, size=blob.size, ref_count=1,
+                                    created_at=datetime.utcnow())
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[MediaBlob.sha256],
+        set_={"ref_count": MediaBlob.ref_count + 1},
+    ))
+
+
+def release(refs):
+    """Drop one reference per content id in refs (legacy paths are ignored); caller commits.
+    Blobs that reach zero stay on disk until the media GC removes them."""
+    ids = [r for r in refs or [] if is_content_id(r)]
+    if ids:
+        MediaBlob.query.filter(MediaBlob.sha256.in_(ids), MediaBlob.ref_count > 0) \
+            .update({MediaBlob.ref_count: MediaBlob.ref_count - 1}, synchronize_session=False)
+
+
+def stored_path(upload_root, stored):
+    """Reminder.alarm_sound -> filesystem path (store-relative for blobs, absolute for legacy uploads)"""
+    return stored if os.path.isabs(stored) else os.path.join(upload_root, *stored.split("/"))
+
+
+def stored_content_id(stored):
+    """Content id behind an alarm_sound value, or None for a legacy path"""
+    name = os.path.splitext(os.path.basename(stored))[0]
+    return name if not os.path.isabs(stored) and is_content_id(name) else None
+
+
+def alarm_sound_candidates(refs, blobs):
+    """Audio entries of media_paths in order, as alarm_sound values; blobs maps content id -> MediaBlob"""
+    for ref in refs or []:
+        if ref in blobs:
+            path = blobs[ref].rel_path
+        elif is_content_id(ref):
+            continue                    # Blob row is gone
+        else:
+            path = ref
+        if os.path.splitext(path)[1].lower() in AUDIO_EXTS:
+            yield path
+
+
+def pick_alarm_sound(refs, blobs, upload_root, exists=os.path.exists):
+    """First audio attachment whose file is present -> alarm_sound value, or None for the built-in sound"""
+    for stored in alarm_sound_candidates(refs, blobs):
+        if exists(stored_path(upload_root, stored)):
+            return stored
+    return None
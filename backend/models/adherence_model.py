@@ -0,0 +1,51 @@
+from backend.config import db
+
+class ReminderOccurrence(db.Model):
+    """Append-only log of what happened to each reminder occurrence (backend/adherence.py).
+    kind: FIRED (dispatcher fired a scheduled dose), REFIRED (a snoozed dose came back), DONE, SNOOZED.
+    Times are local wall clock, like scheduled_at."""
+    __tablename__ = 'reminder_occurrences'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    reminder_id = db.Column(db.Integer, nullable=False)         # No FK: the log outlives deleted reminders
+    kind = db.Column(db.String(10), nullable=False)
+    scheduled_for = db.Column(db.DateTime(timezone=True), nullable=False)     # The dose this event is about
+    occurred_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_reminder_occurrences_user_reminder_occurred", user_id, reminder_id, occurred_at),
+    )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "reminder_id": self.reminder_id,
+            "kind": self.kind,
+            "scheduled_for": self.scheduled_for.isoformat() if self.scheduled_for else None,
+            "occurred_at": self.occurred_at.isoformat() if self.occurred_at else None,
+        }
+
+    def __repr__(self):
+        return f"<ReminderOccurrence rid={self.reminder_id} {self.kind} {self.scheduled_for}>"
+
+
+class AdherenceDaily(db.Model):
+    """Per-user, per-day counters kept up to date with every logged occurrence event (day of the dose)"""
+    __tablename__ = 'adherence_daily'
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    fired = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    snoozed = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_json(self):
+        return {
+            "day": self.day.isoformat(),
+            "fired": self.fired,
+            "done": self.done,
+            "snoozed": self.snoozed,
+            "rate": round(self.done / self.fired, 4) if self.fired else None,
+        }
+
+    def __repr__(self):
+        return f"<AdherenceDaily user={self.user_id} {self.day} {self.done}/{self.fired}>"
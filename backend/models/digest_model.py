@@ -0,0 +1,25 @@
+from backend.config import db
+
+class DigestItem(db.Model):
+    """A fired email reminder waiting to go out in its recipient's next digest (backend/digest.py)"""
+    __tablename__ = 'digest_items'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)    # Patient the reminder belongs to
+    reminder_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(80), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    due_at = db.Column(db.DateTime(timezone=True), nullable=False)      # Occurrence time (local wall clock)
+    queued_at = db.Column(db.DateTime(timezone=True), nullable=False)   # When the dispatcher fired it (local)
+
+    # Flush lease: which worker is rendering this recipient's digest
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # Grouping pass: per recipient, is the oldest waiting item older than the window?
+    __table_args__ = (
+        db.Index("ix_digest_items_recipient_queued_at", recipient, queued_at),
+    )
+
+    def __repr__(self):
+        return f"<DigestItem id={self.id} to={self.recipient} rid={self.reminder_id}>"
@@ -0,0 +1,28 @@
+from backend.config import db
+from datetime import datetime
+
+class MediaBlob(db.Model):
+    """One stored file per distinct content (SHA-256); reminders reference it by content id in media_paths"""
+    __tablename__ = 'media_blobs'
+    sha256 = db.Column(db.String(64), primary_key=True)    # Content id
+    ext = db.Column(db.String(10), nullable=False, default='')   # Extension of the first upload, kept for mimetype
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    @property
+    def rel_path(self):
+        # Sharded by the first two byte pairs so no directory grows past a few thousand entries
+        return f"cas/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}{self.ext}"
+
+    def to_json(self):
+        return {
+            "content_id": self.sha256,
+            "ext": self.ext,
+            "size": self.size,
+            "ref_count": self.ref_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f"<MediaBlob {self.sha256[:12]} refs={self.ref_count}>"
@@ -19,6 +19,18 @@ class Memories(db.Model):
     is_favorite = db.Column(db.Boolean, default=False)
     voice_file_path = db.Column(db.String(255), nullable=True)
 
+    # Keyset pagination for get_memory walks the first index: (created_at, id) is the cursor.
+    # Delta sync (/api/memories/changes) range-scans the second one.
+    __table_args__ = (
+        db.Index("ix_memories_user_id_created_at_id", user_id, created_at.desc(), id),
+        db.Index("ix_memories_user_id_updated_at", user_id, updated_at),
+    )
+
+    # ORM-free list path (backend/serializers.py); keep in step with to_json()
+    json_columns = ("id", "user_id", "title", "content", "tags", "created_at", "updated_at",
+                    "is_favorite", "voice_file_path")
+    json_defaults = {"tags": ()}
+
     def to_json(self):
         return {
             "id": self.id,
@@ -33,4 +45,41 @@ class Memories(db.Model):
         }
 
     def __repr__(self):
-        return f"<Memory id={self.id} title={self.title}>"
\ No newline at end of file
+        return f"<Memory id={self.id} title={self.title}>"
+
+class MemoryTombstone(db.Model):
+    """Deleted card ids kept for delta sync, so clients can drop them without re-downloading the collection"""
+    __tablename__ = 'memory_tombstones'
+    memory_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    deleted_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_memory_tombstones_user_id_deleted_at", user_id, deleted_at),
+    )
+
+    def to_json(self):
+        return {"id": self.memory_id, "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None}
+
+
+class MemoryTag(db.Model):
+    """Normalized copy of Memories.tags: one row per (card, tag), rewritten in the same transaction as the card"""
+    __tablename__ = 'memory_tags'
+    # PK order (user_id, tag, memory_id) answers both "cards with tag X" and per-tag counts from the index alone
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    memory_id = db.Column(db.Integer, db.ForeignKey("memories.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+    @staticmethod
+    def normalize(tags):
+        """Distinct, stripped, non-empty string tags in first-seen order"""
+        seen = []
+        for t in tags or []:
+            if isinstance(t, str):
+                t = t.strip()[:100]
+                if t and t not in seen:
+                    seen.append(t)
+        return seen
+
+    def __repr__(self):
+        return f"<MemoryTag memory_id={self.memory_id} tag={self.tag}>"
@@ -0,0 +1,44 @@
+from backend.config import db
+from datetime import datetime
+
+class EmailOutbox(db.Model):
+    """Queued email; request handlers only insert here, backend/outbox.py delivers over a pooled SMTP session"""
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+
+    recipients = db.Column(db.JSON, nullable=False, default=list)
+    sender = db.Column(db.String(255), nullable=True)      # None -> MAIL_DEFAULT_SENDER at send time
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=True)     # Cleared once SENT or FAILED: PIN emails are not kept
+    kind = db.Column(db.String(30), nullable=False, default='general')   # pin/pin_reset/reminder/test...
+
+    status = db.Column(db.String(20), nullable=False, default='PENDING')  # PENDING/SENDING/SENT/FAILED
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # Worker scan: status = 'PENDING' AND next_attempt_at <= now
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt_at", status, next_attempt_at),
+    )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "recipients": self.recipients or [],
+            "subject": self.subject,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
+
+    def __repr__(self):
+        return f"<EmailOutbox id={self.id} status={self.status}>"
@@ -15,6 +15,13 @@ class QuizQuestion(db.Model):
         return {"qid": self.qid, "text": self.text, "options": self.options or [],
                 "explanation": self.explanation or "", "source_url": self.source_url or ""}
 
+class QuizBankVersion(db.Model):
+    """Single row (id=1) bumped with every write to quiz_questions; see backend/quiz_bank.py"""
+    __tablename__ = "quiz_bank_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
 class QuizAttempt(db.Model):
     __tablename__ = "quiz_attempts"
     id = db.Column(db.Integer, primary_key=True)
@@ -22,6 +29,7 @@ class QuizAttempt(db.Model):
     score = db.Column(db.Integer, default=0)
     total = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    submitted_at = db.Column(db.DateTime(timezone=True))     # Set once by the submit that scored it
 
 class WrongQuestion(db.Model):
     __tablename__ = "wrong_questions"
@@ -35,9 +43,78 @@ class WrongQuestion(db.Model):
     selected_index = db.Column(db.Integer)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
 
+    # Review list (newest first, keyset on created_at/id), per-attempt filter, per-question grouping
+    __table_args__ = (
+        db.Index("ix_wrong_questions_user_id_created_at_id", user_id, created_at, id),
+        db.Index("ix_wrong_questions_user_id_attempt_id", user_id, attempt_id),
+        db.Index("ix_wrong_questions_user_id_qid_created_at", user_id, qid, created_at),
+    )
+
     def to_json(self):
         return {"id": self.id, "qid": self.qid, "text": self.question_text,
                 "options": self.options or [], "correct_index": self.correct_index,
                 "selected_index": self.selected_index,
                 "created_at": self.created_at.isoformat() if self.created_at else None}
 
+
+class QuizReview(db.Model):
+    """Spaced-repetition state of one question for one user (SM-2, backend/quiz_review.py); times are UTC"""
+    __tablename__ = "quiz_reviews"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    qid = db.Column(db.Integer, primary_key=True)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)     # Correct answers in a row
+    interval_days = db.Column(db.Integer, nullable=False, default=0)
+    ease = db.Column(db.Float, nullable=False, default=2.5)
+    lapses = db.Column(db.Integer, nullable=False, default=0)          # Times it was missed after being learned
+    due_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    reviewed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    # "Due for review" quizzes read the first k entries of this index
+    __table_args__ = (
+        db.Index("ix_quiz_reviews_user_id_due_at", user_id, due_at),
+    )
+
+    def to_json(self):
+        return {"qid": self.qid, "repetitions": self.repetitions, "interval_days": self.interval_days,
+                "ease": self.ease, "lapses": self.lapses,
+                "due_at": self.due_at.isoformat() if self.due_at else None,
+                "reviewed_at": self.reviewed_at.isoformat() if self.reviewed_at else None}
+
+class QuizUserStats(db.Model):
+    """Per-user quiz rollup, updated in the quiz_submit transaction (backend/quiz_stats.py)"""
+    __tablename__ = "quiz_user_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)        # Submitted quizzes
+    answered = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    streak = db.Column(db.Integer, nullable=False, default=0)          # Correct answers in a row, up to now
+    best_streak = db.Column(db.Integer, nullable=False, default=0)
+    rolling_accuracy = db.Column(db.Float, nullable=True)              # Moving average over recent answers
+    last_attempt_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def to_json(self):
+        return {"attempts": self.attempts, "answered": self.answered, "correct": self.correct,
+                "accuracy": round(self.correct / self.answered, 4) if self.answered else None,
+                "rolling_accuracy": self.rolling_accuracy, "streak": self.streak, "best_streak": self.best_streak,
+                "last_attempt_at": self.last_attempt_at.isoformat() if self.last_attempt_at else None}
+
+class QuizQuestionStats(db.Model):
+    """Per-user, per-question rollup, updated in the quiz_submit transaction (backend/quiz_stats.py)"""
+    __tablename__ = "quiz_question_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    qid = db.Column(db.Integer, primary_key=True)
+    answered = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    streak = db.Column(db.Integer, nullable=False, default=0)
+    rolling_accuracy = db.Column(db.Float, nullable=True)
+    last_answered_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    # "Weakest questions" reads the first entries of this index
+    __table_args__ = (
+        db.Index("ix_quiz_question_stats_user_id_rolling_accuracy", user_id, rolling_accuracy),
+    )
+
+    def to_json(self):
+        return {"qid": self.qid, "answered": self.answered, "correct": self.correct, "streak": self.streak,
+                "rolling_accuracy": self.rolling_accuracy,
+                "last_answered_at": self.last_answered_at.isoformat() if self.last_answered_at else None}
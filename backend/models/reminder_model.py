@@ -1,4 +1,5 @@
 from backend.config import db
+from backend.recurrence import Recurrence
 from datetime import datetime
 
 class Reminder(db.Model):
@@ -16,8 +17,14 @@ class Reminder(db.Model):
     description = db.Column(db.Text, nullable=True)
 
     scheduled_at = db.Column(db.DateTime(timezone=True), nullable=False)
-    repeat_rule = db.Column(db.String(20), default='NONE') # NONE/DAILY
+    repeat_rule = db.Column(db.String(20), default='NONE') # NONE/DAILY/WEEKLY/MONTHLY
     repeat_interval = db.Column(db.Integer, default=1)
+    # RRULE-style refinements (backend/recurrence.py); None means "as scheduled_at"
+    repeat_weekdays = db.Column(db.JSON, nullable=True)     # ["MO", "WE", "FR"]
+    repeat_monthdays = db.Column(db.JSON, nullable=True)    # [1, 15, -1]
+    repeat_times = db.Column(db.JSON, nullable=True)        # ["07:30", "18:00"]
+    repeat_until = db.Column(db.DateTime(timezone=True), nullable=True)
+    repeat_count = db.Column(db.Integer, nullable=True)
 
     is_active = db.Column(db.Boolean, default=True)
     last_sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -28,11 +35,36 @@ class Reminder(db.Model):
     reminder_type = db.Column(db.String(20), default='general')
 
     media_paths = db.Column(db.JSON, nullable=False, default=list)
+    # Alarm sound picked from media_paths when they change (media_store.pick_alarm_sound): store-relative path of
+    # the blob, a legacy absolute path, or None for the built-in sound. Kept fresh by scripts/validate_alarm_sounds.py
+    alarm_sound = db.Column(db.String(512), nullable=True)
+    # Downscaled copies of image media (backend/media_derivatives.py): {content id: {"thumb": rel path, ...}}
+    media_derivatives = db.Column(db.JSON, nullable=True)
+
+    # Dispatcher lease (backend/dispatcher.py): which worker holds the row and until when.
+    # Also used as a "not before" after a failed send.
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # Audit
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Due-row scan for the dispatcher: is_active = 1 AND next_run_at <= now.
+    # updated_at: change feed for the SSE watcher (backend/events.py)
+    __table_args__ = (
+        db.Index("ix_reminders_is_active_next_run_at", is_active, next_run_at),
+        db.Index("ix_reminders_updated_at", updated_at),
+    )
+
+    # ORM-free list path (backend/serializers.py); keep in step with to_json()
+    json_columns = ("rid", "user_id", "title", "description", "scheduled_at", "repeat_rule", "repeat_interval",
+                    "repeat_weekdays", "repeat_monthdays", "repeat_times", "repeat_until", "repeat_count",
+                    "is_active", "channels", "recipient_email", "reminder_type", "last_sent_at", "next_run_at",
+                    "media_paths", "media_derivatives", "created_at", "updated_at")
+    json_defaults = {"description": "", "channels": (), "media_paths": (), "media_derivatives": {},
+                     "repeat_weekdays": (), "repeat_monthdays": (), "repeat_times": ()}
+
     def to_json(self):
         return {
             "rid": self.rid,
@@ -42,6 +74,11 @@ class Reminder(db.Model):
             "scheduled_at": self.scheduled_at.isoformat() if self.scheduled_at else None,
             "repeat_rule": self.repeat_rule,
             "repeat_interval": self.repeat_interval,
+            "repeat_weekdays": self.repeat_weekdays or [],
+            "repeat_monthdays": self.repeat_monthdays or [],
+            "repeat_times": self.repeat_times or [],
+            "repeat_until": self.repeat_until.isoformat() if self.repeat_until else None,
+            "repeat_count": self.repeat_count,
             "is_active": self.is_active,
             "channels": self.channels or [],
             "recipient_email": self.recipient_email,
@@ -49,9 +86,34 @@ class Reminder(db.Model):
             "last_sent_at": self.last_sent_at.isoformat() if self.last_sent_at else None,
             "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
             "media_paths": self.media_paths or [],
+            "media_derivatives": self.media_derivatives or {},
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+    def recurrence(self):
+        return Recurrence.from_reminder(self)
+
+    def first_run_at(self, at):
+        """next_run_at after a create or a schedule/rule edit (see Recurrence.first_run_at)"""
+        return self.recurrence().first_run_at(at)
+
+    def is_on_schedule(self, t):
+        """True when t is an occurrence of the rule itself (False e.g. for a snoozed next_run_at)"""
+        return self.scheduled_at is not None and self.recurrence().first(not_before=t) == t
+
+    def next_occurrence_after(self, after):
+        """First fire time of the repeat rule strictly after `after`; None when the series is over.
+        Missed occurrences (dispatcher was down) are skipped, not replayed; snoozes don't shift the series."""
+        if (self.repeat_rule or "NONE").upper() == "NONE" or self.scheduled_at is None:
+            return None
+        return self.recurrence().after(after)
+
+    def occurrences(self, lo, hi):
+        """Lazily yield planned fire times in [lo, hi)"""
+        if self.scheduled_at is None:
+            return iter(())
+        return self.recurrence().between(lo, hi)
+
     def __repr__(self):
         return f"<Reminder rid={self.rid} title={self.title}>"
\ No newline at end of file
@@ -0,0 +1,39 @@
+from backend.config import db
+from datetime import datetime
+
+class UploadSession(db.Model):
+    """Resumable chunked upload (memory voice recordings); bytes live in UPLOAD_FOLDER/partial/<id>.part until finalize"""
+    __tablename__ = 'upload_sessions'
+    id = db.Column(db.String(32), primary_key=True)     # uuid4 hex, doubles as the part-file name
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id"),   # Link to user id
+        nullable=False,
+        index=True
+    )
+    memory_id = db.Column(db.Integer, db.ForeignKey("memories.id"), nullable=True)  # Card to attach to on finalize
+
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.Integer, nullable=False)
+    committed_offset = db.Column(db.Integer, nullable=False, default=0)   # Bytes durably on disk
+    status = db.Column(db.String(20), nullable=False, default='OPEN')     # OPEN/FINALIZING/DONE
+    file_path = db.Column(db.String(255), nullable=True)                  # Final path once DONE
+
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_json(self):
+        return {
+            "upload_id": self.id,
+            "memory_id": self.memory_id,
+            "filename": self.filename,
+            "size": self.total_size,
+            "offset": self.committed_offset,
+            "status": self.status,
+            "path": self.file_path,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f"<UploadSession id={self.id} offset={self.committed_offset}/{self.total_size}>"
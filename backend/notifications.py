@@ -0,0 +1,59 @@
+# Message builders shared by the request handlers and the background workers.
+# Nothing here talks to SMTP: enqueue() writes an email_outbox row and backend/outbox.py delivers it.
+from backend.config import db
+from backend.models.outbox_model import EmailOutbox
+from flask_mail import Message
+from email.header import Header
+from datetime import datetime
+
+
+def reminder_body(r):
+    when = (r.scheduled_at.isoformat() if r.scheduled_at else "")
+    rep = ""
+    if r.repeat_rule and r.repeat_rule != "NONE":
+        rep = f"\nFrequency：{r.repeat_rule} x{r.repeat_interval}"
+
+    body_lines = []
+    if r.description:
+        body_lines.append(r.description)
+    if when:
+        body_lines.append(f"Time：{when}")
+    if rep:
+        body_lines.append(rep.strip())
+    if not body_lines:
+        body_lines.append("This is a reminder")
+
+    return "\n".join(body_lines)
+
+
+def reminder_subject(r):
+    return f"[Reminder] {r.title or 'Nontitle'}"
+
+
+def enqueue(recipients, subject, body, sender=None, kind="general"):
+    """Queue one email for the outbox worker; the caller commits (together with whatever triggered it)"""
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    row = EmailOutbox(recipients=list(recipients), subject=subject, body=body, sender=sender, kind=kind,
+                      status='PENDING', attempts=0, next_attempt_at=datetime.utcnow())
+    db.session.add(row)
+    return row
+
+
+def enqueue_reminder(r, to_addr, sender=None):
+    return enqueue([to_addr], reminder_subject(r), reminder_body(r), sender=sender, kind="reminder")
+
+
+def outbox_message(row, default_sender=None):
+    """Rebuild the flask_mail Message for a queued row"""
+    # Avoid 'ascii' error
+    sender = row.sender or default_sender
+    msg = Message(
+        subject=str(Header(row.subject, "utf-8")),
+        recipients=list(row.recipients or []),
+        body=row.body,
+        sender=str(Header(sender, "utf-8")) if sender else None,
+        charset="utf-8",
+    )
+    msg.charset = "utf-8"
+    return msg
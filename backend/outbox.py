@@ -0,0 +1,129 @@
+# Email outbox worker: delivers the rows request handlers and the reminder dispatcher put in email_outbox.
+#
+# Loop per worker: lease a batch of PENDING rows whose next_attempt_at has passed (one UPDATE on the
+# (status, next_attempt_at) index), send them all over ONE mail.connect() session, then write the outcome of the
+# whole batch back with one executemany. Transient failures are retried with exponential backoff; permanent
+# SMTP rejections (5xx) and rows out of attempts end up FAILED with last_error kept for inspection. The body is
+# cleared as soon as a row is SENT or FAILED, and PIN emails are never retried, so a login code is not stored
+# past its one delivery attempt.
+#
+# Run: python -m backend.scripts.outbox_worker
+# Local testing: MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=False and an SMTP stand-in such as
+#   python -m aiosmtpd -n -l localhost:1025
+from backend.config import db, mail
+from backend.models.outbox_model import EmailOutbox
+from backend.notifications import outbox_message
+from backend.dispatcher import default_worker_id
+from sqlalchemy import and_, or_, select, update
+from datetime import datetime, timedelta
+import smtplib, time
+
+LEASE = timedelta(minutes=5)            # A crashed worker's rows become claimable again after this
+BACKOFF_BASE = timedelta(seconds=30)    # 30s, 1m, 2m, 4m ... between attempts
+BACKOFF_MAX = timedelta(hours=1)
+MAX_ATTEMPTS = 8
+ONE_SHOT_KINDS = ("pin", "pin_reset")   # Secrets get one delivery attempt; the user asks for a new code
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+
+def _claimable(at):
+    return or_(
+        and_(EmailOutbox.status == 'PENDING', EmailOutbox.next_attempt_at <= at),
+        and_(EmailOutbox.status == 'SENDING', EmailOutbox.claimed_until < at),     # Lease of a dead worker
+    )
+
+
+def claim_batch(worker_id, at, limit):
+    """Lease up to `limit` sendable rows to this worker (same single-UPDATE scheme as dispatcher.claim_due)"""
+    lease_until = at + LEASE
+    ready = select(EmailOutbox.id).where(_claimable(at)).order_by(EmailOutbox.next_attempt_at).limit(limit)
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ready.scalar_subquery()), _claimable(at))
+        .values(status='SENDING', claimed_by=worker_id, claimed_until=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return EmailOutbox.query.filter_by(claimed_by=worker_id, claimed_until=lease_until, status='SENDING') \
+        .order_by(EmailOutbox.id).all()
+
+
+def _permanent(e):
+    """The server refused this message for good; retrying cannot help"""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code >= 500
+    return isinstance(e, (ValueError, UnicodeError))    # Unbuildable message (bad address, header)
+
+
+def deliver(app, rows):
+    """Send the batch over one SMTP session -> {id: exception or None}"""
+    results = {}
+    sender = app.config.get("MAIL_DEFAULT_SENDER")
+    done = 0
+    try:
+        with mail.connect() as conn:
+            for row in rows:
+                try:
+                    conn.send(outbox_message(row, sender))
+                    results[row.id] = None
+                except smtplib.SMTPServerDisconnected:
+                    raise                   # Session is gone: this row and the rest are retried
+                except Exception as e:
+                    results[row.id] = e
+                done += 1
+    except Exception as e:              # Could not connect, or lost the session part way through
+        for row in rows[done:]:
+            results[row.id] = e
+    return results
+
+
+def send_once(app, worker_id, batch_size=100):
+    """Claim, send and record one batch; returns the number of rows processed"""
+    at = datetime.utcnow()
+    rows = claim_batch(worker_id, at, batch_size)
+    if not rows:
+        return 0
+
+    results = deliver(app, rows)
+    stamp = datetime.utcnow()
+    updates = []
+    for row in rows:
+        error = results[row.id]
+        attempts = row.attempts + 1
+        update_row = {"id": row.id, "attempts": attempts, "claimed_by": None, "claimed_until": None}
+        if error is None:
+            update_row.update(status='SENT', sent_at=stamp, last_error=None, body=None)
+        else:
+            message = f"{error.__class__.__name__}: {error}"
+            if _permanent(error) or attempts >= MAX_ATTEMPTS or row.kind in ONE_SHOT_KINDS:
+                app.logger.error("outbox %s failed for good: %s", row.id, message)
+                update_row.update(status='FAILED', last_error=message, body=None)
+            else:
+                app.logger.warning("outbox %s attempt %s failed: %s", row.id, attempts, message)
+                update_row.update(status='PENDING', last_error=message, next_attempt_at=stamp + backoff(attempts))
+        updates.append(update_row)
+
+    db.session.expunge_all()
+    db.session.execute(update(EmailOutbox), updates)    # ORM bulk UPDATE by primary key -> one executemany
+    db.session.commit()
+    return len(rows)
+
+
+def run(app, worker_id=None, batch_size=100, poll_interval=2.0, once=False):
+    """Drain the outbox, then poll; returns the total processed when once=True"""
+    worker_id = worker_id or default_worker_id()
+    total = 0
+    with app.app_context():
+        app.logger.info("outbox worker %s started", worker_id)
+        while True:
+            n = send_once(app, worker_id, batch_size)
+            total += n
+            if n < batch_size:          # Nothing left that is ready
+                if once:
+                    return total
+                time.sleep(poll_interval)
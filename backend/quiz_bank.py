@@ -0,0 +1,107 @@
+# Process-wide cache of the quiz question bank (quiz_start, quiz_check, quiz_submit).
+#
+# The bank is loaded lazily with one query into a compact array of qids plus one entry per question holding its
+# public JSON already encoded to bytes and the answer key. Starting a quiz picks k random positions of the array
+# (O(k), whatever the size of the bank) and joins the stored bytes; the database is not read while the bank is
+# unchanged.
+#
+# Invalidation: every ORM flush that touches QuizQuestion rows bumps quiz_bank_version in the same transaction
+# (seed script, admin edits). The writing process drops its copy on commit; other processes compare versions at
+# most every QUIZ_BANK_CHECK_SECONDS (one primary-key read) and reload when it moved.
+from backend.config import db
+from backend.models.quiz_model import QuizQuestion, QuizBankVersion
+from backend.serializers import dumps
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from array import array
+from collections import namedtuple
+from datetime import datetime
+import random, threading, time
+
+Question = namedtuple("Question", "qid public answer_index explanation text options")
+
+
+class QuestionBank:
+    def __init__(self, check_interval=30.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._ids = array("q")
+        self._questions = {}            # qid -> Question
+        self._version = None            # quiz_bank_version the copy was loaded at; None = not loaded
+        self._checked_at = 0.0
+
+    def init_app(self, app):
+        self.check_interval = float(app.config.get("QUIZ_BANK_CHECK_SECONDS", self.check_interval))
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _load(self):
+        ids, questions = array("q"), {}
+        rows = db.session.execute(select(QuizQuestion.qid, QuizQuestion.text, QuizQuestion.options,
+                                         QuizQuestion.answer_index, QuizQuestion.explanation,
+                                         QuizQuestion.source_url).order_by(QuizQuestion.qid))
+        for qid, text, options, answer_index, explanation, source_url in rows:
+            ids.append(qid)
+            public = {"qid": qid, "text": text, "options": options or [],
+                      "explanation": explanation or "", "source_url": source_url or ""}     # to_public_json()
+            questions[qid] = Question(qid, dumps(public), answer_index, explanation or "", text, options or [])
+        return ids, questions
+
+    def _current(self):
+        """(qid array, qid -> Question), reloaded when the bank changed"""
+        with self._lock:
+            now = time.monotonic()
+            if self._version is not None and now - self._checked_at < self.check_interval:
+                return self._ids, self._questions
+            version = db.session.execute(
+                select(QuizBankVersion.version).where(QuizBankVersion.id == 1)).scalar() or 0
+            if version != self._version:
+                self._ids, self._questions = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._ids, self._questions
+
+    def sample(self, k, exclude=()):
+        """Up to k distinct random questions, none of whose qid is in exclude -> list of public JSON (bytes)"""
+        ids, questions = self._current()
+        picks = random.sample(range(len(ids)), min(max(k, 0) + len(exclude), len(ids)))
+        return [questions[ids[i]].public for i in picks if ids[i] not in exclude][:max(k, 0)]
+
+    def get(self, qid):
+        return self._current()[1].get(qid)
+
+    def __len__(self):
+        return len(self._current()[0])
+
+
+question_bank = QuestionBank()
+
+
+def bump_version(connection):
+    """Mark the bank changed; part of the caller's transaction. Needed only for writes that bypass the ORM."""
+    stamp = datetime.utcnow()
+    bumped = connection.execute(update(QuizBankVersion).where(QuizBankVersion.id == 1)
+                                .values(version=QuizBankVersion.version + 1, updated_at=stamp)).rowcount
+    if not bumped:
+        connection.execute(insert(QuizBankVersion).values(id=1, version=1, updated_at=stamp))
+
+
+@event.listens_for(Session, "before_flush")
+def _track_bank_writes(session, flush_context, instances):
+    if any(isinstance(o, QuizQuestion) for group in (session.new, session.dirty, session.deleted) for o in group):
+        if not session.info.get("quiz_bank_changed"):
+            bump_version(session.connection())          # Once per transaction is enough
+            session.info["quiz_bank_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_cached_bank(session):
+    if session.info.pop("quiz_bank_changed", False):
+        question_bank.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bank_writes(session):
+    session.info.pop("quiz_bank_changed", None)
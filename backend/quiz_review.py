@@ -0,0 +1,60 @@
+# Spaced repetition for quizzes (SM-2): every answered question gets a per-user review state in quiz_reviews,
+# updated inside the quiz_submit transaction. A hit stretches the interval (1 day, 6 days, then interval * ease);
+# a miss brings the question back tomorrow and lowers its ease. "Due for review" quizzes take the k earliest
+# due_at entries of the (user_id, due_at) index, so picking one costs O(k) whatever the user's history.
+from backend.config import db
+from backend.models.quiz_model import QuizReview
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import timedelta
+
+QUALITY_CORRECT = 4             # SM-2 grades 0-5; the quiz only knows right or wrong
+QUALITY_WRONG = 1
+MIN_EASE = 1.3
+START_EASE = 2.5
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+_STATE = ("repetitions", "interval_days", "ease", "lapses", "due_at", "reviewed_at")
+
+
+def schedule(state, correct, at):
+    """Next review state after one answer; state is a dict of _STATE (None for a first answer)"""
+    repetitions = state["repetitions"] if state else 0
+    interval = state["interval_days"] if state else 0
+    ease = state["ease"] if state else START_EASE
+    lapses = state["lapses"] if state else 0
+
+    q = QUALITY_CORRECT if correct else QUALITY_WRONG
+    ease = max(MIN_EASE, ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if correct:
+        repetitions += 1
+        interval = 1 if repetitions == 1 else 6 if repetitions == 2 else max(interval + 1, round(interval * ease))
+    else:
+        lapses += 1 if repetitions else 0
+        repetitions, interval = 0, 1
+    return {"repetitions": repetitions, "interval_days": interval, "ease": round(ease, 4), "lapses": lapses,
+            "due_at": at + timedelta(days=interval), "reviewed_at": at}
+
+
+def record(user_id, results, at):
+    """Apply {qid: correct} for one user: one IN query for the current states, one executemany upsert.
+    The caller commits."""
+    if not results:
+        return
+    current = {row.qid: row._asdict() for row in db.session.execute(
+        select(QuizReview.qid, *[getattr(QuizReview, c) for c in _STATE])
+        .where(QuizReview.user_id == user_id, QuizReview.qid.in_(list(results))))}
+    rows = [{"user_id": user_id, "qid": qid, **schedule(current.get(qid), correct, at)}
+            for qid, correct in results.items()]
+
+    stmt = _UPSERT_INSERTS[db.engine.dialect.name](QuizReview)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[QuizReview.user_id, QuizReview.qid],
+        set_={c: getattr(stmt.excluded, c) for c in _STATE},
+    ), rows)
+
+
+def due(user_id, at, limit):
+    """qids due for review at `at`, most overdue first"""
+    return db.session.execute(
+        select(QuizReview.qid).where(QuizReview.user_id == user_id, QuizReview.due_at <= at)
+        .order_by(QuizReview.due_at).limit(limit)).scalars().all()
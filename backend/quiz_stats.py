@@ -0,0 +1,142 @@
+# Quiz progress rollups: quiz_user_stats (one row per user) and quiz_question_stats (one row per user and
+# question) are updated inside the quiz_submit transaction, so the stats endpoint reads a handful of rows
+# instead of scanning quiz_attempts/wrong_questions. Counters are added in the upsert itself (exact under
+# concurrent submits); streaks and the rolling accuracy are folded from the row read at the start of the submit.
+#
+# rebuild() recomputes the rollups from history (python -m backend.scripts.backfill_quiz_stats).
+from backend.config import db
+from backend.models.quiz_model import QuizAttempt, QuizQuestionStats, QuizUserStats, WrongQuestion
+from backend.models.user_model import User
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+ALPHA = 0.1                 # Rolling accuracy: exponential moving average, roughly the last 20 answers
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _fold(state, outcomes):
+    """Apply answers (True = correct) in order to {"streak", "best_streak", "rolling_accuracy"}"""
+    streak, best, rolling = state["streak"], state.get("best_streak", 0), state["rolling_accuracy"]
+    for ok in outcomes:
+        streak = streak + 1 if ok else 0
+        best = max(best, streak)
+        rolling = float(ok) if rolling is None else round(rolling + ALPHA * (float(ok) - rolling), 4)
+    return {"streak": streak, "best_streak": best, "rolling_accuracy": rolling}
+
+
+def _upsert(model, rows, keys, added, replaced):
+    """INSERT ... ON CONFLICT: `added` columns are incremented by the new values, `replaced` ones overwritten"""
+    stmt = _UPSERT_INSERTS[db.engine.dialect.name](model)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[getattr(model, k) for k in keys],
+        set_={**{c: getattr(model, c) + getattr(stmt.excluded, c) for c in added},
+              **{c: getattr(stmt.excluded, c) for c in replaced}},
+    ), rows)
+
+
+def record(user_id, answers, at):
+    """Roll one submitted quiz into the stats; answers is [(qid, correct)] in answer order. Caller commits."""
+    user = db.session.execute(select(QuizUserStats.streak, QuizUserStats.best_streak,
+                                     QuizUserStats.rolling_accuracy)
+                              .where(QuizUserStats.user_id == user_id)).first()
+    state = user._asdict() if user else {"streak": 0, "best_streak": 0, "rolling_accuracy": None}
+    row = {"user_id": user_id, "attempts": 1, "answered": len(answers), "correct": sum(ok for _, ok in answers),
+           "last_attempt_at": at, **_fold(state, [ok for _, ok in answers])}
+    _upsert(QuizUserStats, [row], ["user_id"], ("attempts", "answered", "correct"),
+            ("streak", "best_streak", "rolling_accuracy", "last_attempt_at"))
+    if not answers:
+        return
+
+    by_question = {}
+    for qid, ok in answers:
+        by_question.setdefault(qid, []).append(ok)
+    current = {r.qid: r._asdict() for r in db.session.execute(
+        select(QuizQuestionStats.qid, QuizQuestionStats.streak, QuizQuestionStats.rolling_accuracy)
+        .where(QuizQuestionStats.user_id == user_id, QuizQuestionStats.qid.in_(list(by_question))))}
+    rows = []
+    for qid, outcomes in by_question.items():
+        folded = _fold(current.get(qid) or {"streak": 0, "rolling_accuracy": None}, outcomes)
+        rows.append({"user_id": user_id, "qid": qid, "answered": len(outcomes), "correct": sum(outcomes),
+                     "streak": folded["streak"], "rolling_accuracy": folded["rolling_accuracy"],
+                     "last_answered_at": at})
+    _upsert(QuizQuestionStats, rows, ["user_id", "qid"], ("answered", "correct"),
+            ("streak", "rolling_accuracy", "last_answered_at"))
+
+
+def user_stats(user_id, weakest=10):
+    """Rollup for the stats endpoint: totals plus the questions with the lowest rolling accuracy"""
+    stats = db.session.get(QuizUserStats, user_id) or QuizUserStats(
+        user_id=user_id, attempts=0, answered=0, correct=0, streak=0, best_streak=0)
+    rows = QuizQuestionStats.query.filter(
+        QuizQuestionStats.user_id == user_id,
+        QuizQuestionStats.rolling_accuracy.isnot(None),
+    ).order_by(QuizQuestionStats.rolling_accuracy).limit(weakest).all() if weakest else []
+    return {"user": stats.to_json(), "weakest": [r.to_json() for r in rows]}
+
+
+# -- backfill -----------------------------------------------------------------------------------------------------
+def _rebuild_users(user_ids):
+    """Recompute quiz_user_stats for these users from quiz_attempts -> rows written.
+
+    Only the score of an attempt is stored, not the order of its answers: misses are taken to come last, so a
+    streak is cut by every imperfect attempt. Started but never submitted attempts (score 0, no misses) are
+    skipped."""
+    misses = dict(db.session.execute(
+        select(WrongQuestion.attempt_id, func.count())
+        .where(WrongQuestion.user_id.in_(user_ids)).group_by(WrongQuestion.attempt_id)).all())
+    rows, current = [], None
+    for a in db.session.execute(
+            select(QuizAttempt.id, QuizAttempt.user_id, QuizAttempt.score, QuizAttempt.created_at)
+            .where(QuizAttempt.user_id.in_(user_ids))
+            .order_by(QuizAttempt.user_id, QuizAttempt.created_at, QuizAttempt.id)):
+        missed = misses.get(a.id, 0)
+        if not a.score and not missed:
+            continue
+        if current is None or current["user_id"] != a.user_id:
+            current = {"user_id": a.user_id, "attempts": 0, "answered": 0, "correct": 0, "streak": 0,
+                       "best_streak": 0, "rolling_accuracy": None, "last_attempt_at": None}
+            rows.append(current)
+        current.update(_fold(current, [True] * (a.score or 0) + [False] * missed))
+        current["attempts"] += 1
+        current["answered"] += (a.score or 0) + missed
+        current["correct"] += a.score or 0
+        current["last_attempt_at"] = a.created_at
+    if rows:
+        _upsert(QuizUserStats, rows, ["user_id"], (),
+                ("attempts", "answered", "correct", "streak", "best_streak", "rolling_accuracy", "last_attempt_at"))
+    return len(rows)
+
+
+def _backfill_questions(user_ids):
+    """Create quiz_question_stats rows from wrong_questions -> rows offered.
+
+    History only records misses per question, so these rows start with answered = misses and no correct
+    answers; rows that already exist (kept up to date by quiz_submit) are left alone."""
+    rows = [{"user_id": user_id, "qid": qid, "answered": n, "correct": 0, "streak": 0, "rolling_accuracy": 0.0,
+             "last_answered_at": last}
+            for user_id, qid, n, last in db.session.execute(
+                select(WrongQuestion.user_id, WrongQuestion.qid, func.count(), func.max(WrongQuestion.created_at))
+                .where(WrongQuestion.user_id.in_(user_ids))
+                .group_by(WrongQuestion.user_id, WrongQuestion.qid))]
+    if rows:
+        stmt = _UPSERT_INSERTS[db.engine.dialect.name](QuizQuestionStats)
+        db.session.execute(stmt.on_conflict_do_nothing(index_elements=[QuizQuestionStats.user_id,
+                                                                       QuizQuestionStats.qid]), rows)
+    return len(rows)
+
+
+def rebuild(batch_size=200, log=None):
+    """Backfill both rollups for all users, batch_size users per transaction -> (user rows, question rows)"""
+    users = questions = 0
+    last_id = 0
+    while True:
+        ids = db.session.execute(select(User.id).where(User.id > last_id).order_by(User.id)
+                                 .limit(batch_size)).scalars().all()
+        if not ids:
+            return users, questions
+        last_id = ids[-1]
+        users += _rebuild_users(ids)
+        questions += _backfill_questions(ids)
+        db.session.commit()
+        if log:
+            log(f"users up to id {last_id}: {users} user rows, {questions} question rows")
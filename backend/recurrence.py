@@ -0,0 +1,238 @@
+# RRULE-style recurrence for reminders (subset of RFC 5545, WKST=MO):
+#   FREQ      repeat_rule       NONE / DAILY / WEEKLY / MONTHLY
+#   INTERVAL  repeat_interval   every n days / weeks / months
+#   BYDAY     repeat_weekdays   ["MO", "WE", "FR"]          (WEEKLY; default: weekday of scheduled_at)
+#   BYMONTHDAY repeat_monthdays [1, 15, -1]                 (MONTHLY; -1 = last day; default: day of scheduled_at)
+#   times     repeat_times      ["07:30", "18:00"]          (every rule; default: time of scheduled_at)
+#   UNTIL     repeat_until      last allowed fire time (inclusive)
+#   COUNT     repeat_count      total number of occurrences
+#
+# Occurrences are generated lazily, one period (day / week / month) at a time, starting at the period that
+# contains the requested window: cost is bounded by the window, not by how long the reminder has existed.
+# Like dateutil, scheduled_at is the start of the series and only counts when it matches the rule.
+# All datetimes are naive local wall-clock times, as picked in the frontend.
+from datetime import datetime, date, time, timedelta, timezone
+import calendar, re
+
+FREQS = ("NONE", "DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+MAX_EMPTY_PERIODS = 100     # e.g. "every 12 months on the 30th" starting in February never fires
+_TIME_RE = re.compile(r"^([01]?\d|2[0-3]):([0-5]\d)(?::([0-5]\d))?$")
+
+
+def _add_months(year, month, n):
+    m = year * 12 + month - 1 + n
+    return m // 12, m % 12 + 1
+
+
+class Recurrence:
+    def __init__(self, start, freq="NONE", interval=1, weekdays=(), monthdays=(), times=(), until=None,
+                 count=None):
+        self.start = start
+        self.freq = (freq or "NONE").upper()
+        self.interval = max(1, int(interval or 1))
+        self.weekdays = sorted({WEEKDAYS.index(d) for d in weekdays}) or [start.weekday()]
+        self.monthdays = sorted(set(monthdays)) or [start.day]
+        self.times = sorted({_parse_time(t) for t in times}) or [start.time()]
+        self.until = until
+        self.count = count
+        if self.freq == "WEEKLY":
+            self._anchor = start.date() - timedelta(days=start.weekday())     # Monday of the first week
+        else:
+            self._anchor = start.date()
+
+    @classmethod
+    def from_reminder(cls, r):
+        return cls(r.scheduled_at, r.repeat_rule, r.repeat_interval, r.repeat_weekdays or (),
+                   r.repeat_monthdays or (), r.repeat_times or (), r.repeat_until, r.repeat_count)
+
+    @classmethod
+    def from_fields(cls, f):
+        """Same as from_reminder for a dict of Reminder column values"""
+        return cls(f["scheduled_at"], f.get("repeat_rule"), f.get("repeat_interval"),
+                   f.get("repeat_weekdays") or (), f.get("repeat_monthdays") or (), f.get("repeat_times") or (),
+                   f.get("repeat_until"), f.get("repeat_count"))
+
+    # -- periods ----------------------------------------------------------------------------------------------
+    def _period_of(self, d):
+        """Index of the period containing date d (may be negative)"""
+        if self.freq == "DAILY":
+            return (d - self._anchor).days // self.interval
+        if self.freq == "WEEKLY":
+            return (d - self._anchor).days // (7 * self.interval)
+        months = (d.year * 12 + d.month) - (self._anchor.year * 12 + self._anchor.month)
+        return months // self.interval
+
+    def _dates(self, k):
+        """Dates with occurrences in period k, ascending"""
+        if self.freq == "DAILY":
+            return [self._anchor + timedelta(days=k * self.interval)]
+        if self.freq == "WEEKLY":
+            monday = self._anchor + timedelta(weeks=k * self.interval)
+            return [monday + timedelta(days=wd) for wd in self.weekdays]
+        year, month = _add_months(self._anchor.year, self._anchor.month, k * self.interval)
+        last = calendar.monthrange(year, month)[1]
+        days = {d if d > 0 else last + 1 + d for d in self.monthdays}
+        return [date(year, month, d) for d in sorted(days) if 1 <= d <= last]
+
+    def _first_date(self, k):
+        if self.freq == "MONTHLY":
+            return date(*_add_months(self._anchor.year, self._anchor.month, k * self.interval), 1)
+        return self._dates(k)[0]
+
+    def _count_before(self, k):
+        """Occurrences (>= start) in periods 0..k-1; O(1) unless month lengths matter"""
+        if k <= 0:
+            return 0
+        skipped = sum(1 for d in self._dates(0) for t in self.times if datetime.combine(d, t) < self.start)
+        if self.freq == "MONTHLY" and self._month_length_matters():
+            return sum(len(self._dates(i)) for i in range(k)) * len(self.times) - skipped
+        return k * len(self._dates(0)) * len(self.times) - skipped
+
+    def _month_length_matters(self):
+        """Whether the number of distinct monthdays can differ between months: a day past the 28th, or a
+        positive and a negative day that land on the same date in some month length (15 and -17 in 31 days)"""
+        if any(d > 28 or d < -28 for d in self.monthdays):
+            return True
+        return any(29 <= p - n <= 32 for p in self.monthdays if p > 0 for n in self.monthdays if n < 0)
+
+    # -- expansion --------------------------------------------------------------------------------------------
+    def between(self, lo, hi=None):
+        """Yield occurrences with lo <= t < hi (hi=None: until the series ends), ascending"""
+        if self.freq == "NONE":
+            if lo <= self.start and (hi is None or self.start < hi):
+                yield self.start
+            return
+
+        k = max(0, self._period_of(max(lo, self.start).date()))
+        n = self._count_before(k) if self.count is not None else 0
+        empty = 0
+        while True:
+            if hi is not None and self._first_date(k) > hi.date():
+                return
+            dates = self._dates(k)
+            empty = 0 if dates else empty + 1
+            if empty > MAX_EMPTY_PERIODS:
+                return
+            for d in dates:
+                for t in self.times:
+                    at = datetime.combine(d, t)
+                    if at < self.start:
+                        continue
+                    if (self.count is not None and n >= self.count) or (self.until and at > self.until):
+                        return
+                    n += 1
+                    if at < lo:
+                        continue
+                    if hi is not None and at >= hi:
+                        return
+                    yield at
+            k += 1
+
+    def after(self, t):
+        """First occurrence strictly after t, or None when the series is over"""
+        return next(self.between(t + timedelta(microseconds=1)), None)
+
+    def first(self, not_before=None):
+        """First occurrence at or after not_before (default: the start of the series)"""
+        return next(self.between(max(not_before or self.start, self.start)), None)
+
+    def first_run_at(self, at):
+        """next_run_at for a new or rescheduled reminder at local time `at`: a one-shot fires at its start (even if
+        already past), a series at its first occurrence from `at` on"""
+        if self.freq == "NONE":
+            return self.start
+        return self.first(not_before=at)
+
+
+# -- request parsing --------------------------------------------------------------------------------------------
+def _parse_time(value):
+    if isinstance(value, time):
+        return value
+    m = _TIME_RE.match(str(value).strip())
+    if not m:
+        raise ValueError(f"bad time of day: {value!r} (use HH:MM)")
+    return time(int(m.group(1)), int(m.group(2)), int(m.group(3) or 0))
+
+
+def _format_time(t):
+    return t.strftime("%H:%M:%S" if t.second else "%H:%M")
+
+
+def _parse_until(value):
+    """UNTIL -> naive local wall-clock time; UTC (...Z) and offset values are converted like an imported DTSTART"""
+    value = str(value).strip()
+    if re.match(r"^\d{8}(T\d{6}Z?)?$", value):      # RRULE form: 20261231, 20261231T235959 or 20261231T235959Z
+        until = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S" if "T" in value else "%Y%m%d")
+        if value.endswith("Z"):
+            until = until.replace(tzinfo=timezone.utc)
+    else:
+        until = datetime.fromisoformat(value)
+    return until.astimezone().replace(tzinfo=None) if until.tzinfo else until
+
+
+def parse_rrule(text):
+    """'FREQ=WEEKLY;BYDAY=MO,WE,FR;BYHOUR=7,18;BYMINUTE=0;COUNT=10' -> request-style fields"""
+    parts = {}
+    for item in (text or "").strip().removeprefix("RRULE:").split(";"):
+        if item.strip():
+            key, _, value = item.partition("=")
+            parts[key.strip().upper()] = value.strip()
+    data = {"repeat_rule": parts.get("FREQ", "NONE")}
+    if "INTERVAL" in parts:
+        data["repeat_interval"] = parts["INTERVAL"]
+    if "BYDAY" in parts:
+        data["repeat_weekdays"] = [d[-2:] for d in parts["BYDAY"].split(",")]      # "+1MO" positions unsupported
+    if "BYMONTHDAY" in parts:
+        data["repeat_monthdays"] = parts["BYMONTHDAY"].split(",")
+    if "BYHOUR" in parts:
+        minutes = parts.get("BYMINUTE", "0").split(",")
+        data["repeat_times"] = [f"{int(h):02d}:{int(m):02d}" for h in parts["BYHOUR"].split(",") for m in minutes]
+    if "UNTIL" in parts:
+        data["repeat_until"] = parts["UNTIL"]
+    if "COUNT" in parts:
+        data["repeat_count"] = parts["COUNT"]
+    return data
+
+
+def rule_fields(data):
+    """Validate the recurrence keys present in a request body -> (fields, error).
+
+    Accepts the column names (repeat_rule, repeat_weekdays, ...) or an "rrule" string. Only keys that are present
+    end up in fields, so PATCH can apply them as they are.
+    """
+    if data.get("rrule"):
+        data = {**data, **parse_rrule(data["rrule"])}
+    fields = {}
+    try:
+        if "repeat_rule" in data:
+            rule = (data["repeat_rule"] or "NONE").strip().upper()
+            if rule not in FREQS:
+                return None, f"repeat_rule must be one of {', '.join(FREQS)}"
+            fields["repeat_rule"] = rule
+        if "repeat_interval" in data:
+            fields["repeat_interval"] = int(data["repeat_interval"] or 1)
+            if fields["repeat_interval"] < 1:
+                return None, "repeat_interval must be >= 1"
+        if "repeat_weekdays" in data:
+            days = [str(d).strip().upper()[:2] for d in data["repeat_weekdays"] or []]
+            if any(d not in WEEKDAYS for d in days):
+                return None, f"repeat_weekdays must use {', '.join(WEEKDAYS)}"
+            fields["repeat_weekdays"] = sorted(set(days), key=WEEKDAYS.index) or None
+        if "repeat_monthdays" in data:
+            days = sorted({int(d) for d in data["repeat_monthdays"] or []})
+            if any(d == 0 or not -31 <= d <= 31 for d in days):
+                return None, "repeat_monthdays must be 1..31 or -31..-1"
+            fields["repeat_monthdays"] = days or None
+        if "repeat_times" in data:
+            times = sorted({_parse_time(t) for t in data["repeat_times"] or []})
+            fields["repeat_times"] = [_format_time(t) for t in times] or None
+        if "repeat_until" in data:
+            fields["repeat_until"] = _parse_until(data["repeat_until"]) if data["repeat_until"] else None
+        if "repeat_count" in data:
+            fields["repeat_count"] = int(data["repeat_count"]) if data["repeat_count"] not in (None, "") else None
+            if fields["repeat_count"] is not None and fields["repeat_count"] < 1:
+                return None, "repeat_count must be >= 1"
+    except (TypeError, ValueError) as e:
+        return None, str(e) or "invalid recurrence"
+    return fields, None
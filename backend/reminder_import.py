@@ -0,0 +1,232 @@
+# Bulk reminder import from CSV or iCalendar (POST /api/reminders/import, scripts/import_reminders.py).
+#
+# Input is read one line at a time and rows are inserted in chunks of `chunk_size` (one executemany + commit
+# each), so memory stays flat whatever the file size: only the current chunk and the first MAX_REPORTED_ERRORS
+# error messages are held. Every row goes through parse_new_reminder(), the same rules as /api/create_reminder.
+#
+# CSV: header row, columns named like the create_reminder fields (title, scheduled_at, channels, description,
+#      recipient_email, reminder_type, is_active, repeat_rule, repeat_interval, repeat_weekdays, repeat_monthdays,
+#      repeat_times, repeat_until, repeat_count, rrule). List cells are separated by ";", e.g. "MO;WE;FR".
+# ICS: one reminder per VEVENT (SUMMARY, DESCRIPTION, DTSTART, RRULE); nested VALARMs are skipped.
+from backend.config import db
+from backend.models.reminder_model import Reminder
+from backend.recurrence import Recurrence, rule_fields
+from sqlalchemy import insert
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import csv, re
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+RULE_KEYS = ("repeat_rule", "repeat_interval", "repeat_weekdays", "repeat_monthdays", "repeat_times",
+             "repeat_until", "repeat_count")
+LIST_COLUMNS = ("channels", "repeat_weekdays", "repeat_monthdays", "repeat_times")
+_LIST_SPLIT_RE = re.compile(r"[;|\s]+")
+
+
+def parse_new_reminder(data):
+    """create_reminder validation -> (Reminder kwargs without user_id/next_run_at, error message)"""
+    title = (data.get('title') or "").strip()
+    channels = data.get('channels') or []
+    scheduled_at = data.get('scheduled_at')
+    if not title or not scheduled_at or not channels:
+        return None, "title, scheduled_at and channels are required"
+    if not isinstance(channels, list):
+        return None, "channels must be a list"
+    try:
+        when = datetime.fromisoformat(scheduled_at)
+    except Exception:
+        return None, "scheduled_at must be ISO datetime string"
+
+    rule, error = rule_fields({"repeat_rule": None, "repeat_interval": 1, **data})
+    if error:
+        return None, error
+
+    fields = {
+        "title": title,
+        "description": (data.get("description") or "").strip(),
+        "scheduled_at": when,
+        "is_active": bool(data.get('is_active', True)),
+        "channels": channels,
+        "recipient_email": (data.get('recipient_email') or "").strip(),
+        "reminder_type": (data.get('reminder_type') or "general").strip(),
+        "media_paths": [],
+    }
+    fields.update({k: None for k in RULE_KEYS})     # Same keys on every row -> one executemany per chunk
+    fields.update(rule)
+    return fields, None
+
+
+# -- CSV ----------------------------------------------------------------------------------------------------------
+def _csv_record(row):
+    data = {}
+    for key, value in row.items():
+        if key is None or value is None:
+            continue                    # Cells beyond the header
+        key, value = key.strip().lower(), value.strip()
+        if not value:
+            continue
+        if key in LIST_COLUMNS:
+            value = [v for v in _LIST_SPLIT_RE.split(value) if v]
+        elif key == "is_active":
+            value = value.lower() not in ("0", "false", "no", "off")
+        data[key] = value
+    return data
+
+
+def read_csv(lines):
+    """Yield (line number, create_reminder-style dict) per data row"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, _csv_record(row)
+
+
+# -- iCalendar ----------------------------------------------------------------------------------------------------
+def _unfold(lines):
+    """Undo RFC 5545 line folding -> (line number, logical line)"""
+    current, start = None, 0
+    for n, raw in enumerate(lines, 1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and current is not None:
+            current += raw[1:]
+            continue
+        if current:
+            yield start, current
+        current, start = raw, n
+    if current:
+        yield start, current
+
+
+def _split_property(line):
+    """'DTSTART;TZID=Europe/Berlin:20261017T090000' -> ('DTSTART', {'TZID': 'Europe/Berlin'}, '20261017T090000')"""
+    quoted = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return line.upper(), {}, ""
+    name, *params = head.split(";")
+    return name.strip().upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+def _ics_text(value):
+    return re.sub(r"\\([nN,;\\])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _ics_datetime(params, value):
+    """DTSTART -> local wall-clock ISO string (the same convention as scheduled_at from the frontend)"""
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return datetime.strptime(value, "%Y%m%d").isoformat()
+        dt = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+        if value.endswith("Z"):
+            dt = dt.replace(tzinfo=timezone.utc)
+        elif params.get("TZID"):
+            try:
+                dt = dt.replace(tzinfo=ZoneInfo(params["TZID"].strip('"')))
+            except Exception:
+                pass                    # Unknown zone: take the wall-clock time as written
+        if dt.tzinfo:
+            dt = dt.astimezone().replace(tzinfo=None)
+        return dt.isoformat()
+    except ValueError:
+        return value                    # parse_new_reminder reports it
+
+
+def _ics_record(props):
+    data = {}
+    if "SUMMARY" in props:
+        data["title"] = _ics_text(props["SUMMARY"][1])
+    if "DESCRIPTION" in props:
+        data["description"] = _ics_text(props["DESCRIPTION"][1])
+    if "DTSTART" in props:
+        data["scheduled_at"] = _ics_datetime(*props["DTSTART"])
+    if "RRULE" in props:
+        data["rrule"] = props["RRULE"][1]
+    return data
+
+
+def read_ics(lines):
+    """Yield (line number of BEGIN:VEVENT, create_reminder-style dict) per event"""
+    props, depth, start = None, 0, 0
+    for n, line in _unfold(lines):
+        name, params, value = _split_property(line)
+        value_upper = value.strip().upper()
+        if name == "BEGIN":
+            if props is None and value_upper == "VEVENT":
+                props, depth, start = {}, 0, n
+            elif props is not None:
+                depth += 1              # VALARM and friends
+        elif name == "END" and props is not None:
+            if depth:
+                depth -= 1
+            elif value_upper == "VEVENT":
+                yield start, _ics_record(props)
+                props = None
+        elif props is not None and not depth:
+            props.setdefault(name, (params, value))
+
+
+READERS = {"csv": read_csv, "ics": read_ics}
+
+
+def detect_format(filename=None, mimetype=None):
+    name = (filename or "").lower()
+    if name.endswith((".ics", ".ical", ".ifb")) or mimetype == "text/calendar":
+        return "ics"
+    if name.endswith(".csv") or mimetype in ("text/csv", "application/csv"):
+        return "csv"
+    return None
+
+
+# -- import -------------------------------------------------------------------------------------------------------
+def _error(report, line, message):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"line": line, "error": message})
+    else:
+        report["errors_truncated"] = True
+
+
+def _flush(batch, report):
+    if not batch:
+        return
+    try:
+        db.session.execute(insert(Reminder), [row for _, row in batch])    # One executemany per chunk
+        db.session.commit()
+        report["imported"] += len(batch)
+    except Exception as e:
+        db.session.rollback()
+        for line, _ in batch:
+            _error(report, line, f"{e.__class__.__name__}: {e}")
+    batch.clear()
+
+
+def import_reminders(records, user_id, at, default_channels=("alarm",), chunk_size=CHUNK_SIZE):
+    """Validate and insert (line, dict) records for one user; `at` is the local time used for next_run_at.
+    Returns {"imported", "failed", "errors": [{"line", "error"}], "errors_truncated"[, "error"]}."""
+    report = {"imported": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch = []
+    line = 0
+    try:
+        for line, data in records:
+            if not data.get("channels"):
+                data["channels"] = list(default_channels)
+            fields, error = parse_new_reminder(data)
+            if error:
+                _error(report, line, error)
+                continue
+            stamp = datetime.utcnow()
+            fields.update(user_id=user_id, next_run_at=Recurrence.from_fields(fields).first_run_at(at),
+                          created_at=stamp, updated_at=stamp)
+            batch.append((line, fields))
+            if len(batch) >= chunk_size:
+                _flush(batch, report)
+    except (csv.Error, UnicodeDecodeError, ValueError) as e:
+        # Unreadable input: keep what was imported so far, report where the file broke
+        report["error"] = f"line {line + 1}: {e.__class__.__name__}: {e}"
+    _flush(batch, report)
+    return report
@@ -0,0 +1,63 @@
+# backend/routes/media.py
+# Serves content-addressed uploads (see backend/media_store.py) to the owner's clients.
+from flask import jsonify, request, send_file
+from flask_login import login_required, current_user
+from sqlalchemy import String, cast
+from backend.config import db
+from backend.models.media_model import MediaBlob
+from backend.models.reminder_model import Reminder
+from backend import media_store
+from backend.media_derivatives import SIZES, derived_rel_path
+import mimetypes, os
+
+# Content ids never change meaning, so clients may keep a copy for as long as they like
+MEDIA_MAX_AGE = 365 * 24 * 3600
+
+def _err(message, status=400):
+    return jsonify({"error": message}), status
+
+def media_url(content_id):
+    return f"/api/media/{content_id}"
+
+def register(app):
+    @app.route('/api/media/<content_id>', methods=['GET'])
+    @login_required
+    def get_media(content_id):
+        """Stream a stored file. Supports Range (audio seeking), ETag/If-None-Match and X-Sendfile.
+        Only readable by users who have it attached to one of their reminders.
+        ?size=thumb|display serves the downscaled JPEG when it has been rendered, else the original."""
+        if not media_store.is_content_id(content_id):
+            return _err("media not found", 404)
+        # Content ids are 64 hex chars, so a substring match on the JSON text cannot hit a different id
+        owned = db.session.query(Reminder.rid).filter(
+            Reminder.user_id == current_user.id,
+            cast(Reminder.media_paths, String).contains(content_id),
+        ).first()
+        blob = db.session.get(MediaBlob, content_id) if owned else None
+        if not blob:
+            return _err("media not found", 404)
+
+        folder = app.config.get("UPLOAD_FOLDER", "uploads")
+        path, etag = media_store.blob_path(folder, blob), content_id
+        size = request.args.get("size")
+        if size in SIZES:
+            derived = os.path.join(folder, *derived_rel_path(content_id, size).split("/"))
+            if os.path.exists(derived):
+                path, etag = derived, f"{content_id}.{size}"
+        if not os.path.exists(path):
+            return _err("media file missing", 404)
+
+        # conditional=True: werkzeug answers If-None-Match with 304 and Range with 206.
+        # The body goes out through wsgi.file_wrapper (sendfile where the server supports it), or as an
+        # X-Sendfile header for the front proxy when USE_X_SENDFILE is on.
+        response = send_file(
+            path,
+            mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            conditional=True,
+            etag=etag,
+            max_age=MEDIA_MAX_AGE,
+        )
+        response.cache_control.private = True
+        response.cache_control.public = False
+        response.cache_control.immutable = True
+        return response
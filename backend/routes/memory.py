@@ -1,8 +1,41 @@
-from flask import jsonify,request,make_response
+from flask import jsonify,request,make_response,Response
 from flask_login import login_required, current_user
 from backend.config import db
-from backend.models.memory_model import Memories
-from datetime import datetime
+from backend.cache import list_cache
+from backend.serializers import dumps, project, rows_to_json
+from backend.models.memory_model import Memories, MemoryTag, MemoryTombstone
+from sqlalchemy import and_, or_, func, text
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timedelta, timezone
+import base64, hashlib, re
+
+PAGE_DEFAULT = 50
+PAGE_MAX = 200
+SEARCH_PAGE_DEFAULT = 20
+SEARCH_PAGE_MAX = 100
+BATCH_MAX = 500
+SYNC_PAGE_DEFAULT = 200
+SYNC_PAGE_MAX = 1000
+# Writes stamped in the last moment may still be uncommitted; delta sync stops short of them so the
+# next call picks them up instead of skipping past them
+SYNC_LAG = timedelta(seconds=2)
+
+# memories_fts is created by migration ef9753884700 (FTS5 over title/content/tags, kept in sync by triggers);
+# cd4c2af33466 adds user_id as a tokenized column so the MATCH itself is scoped to one user (see _fts_query).
+# bm25 weights: a hit in the title counts more than one in the tags, which counts more than the body; user_id
+# matches every row of the user and is not ranked.
+_SEARCH_SQL = text("""
+    SELECT m.id,
+           highlight(memories_fts, 0, '<mark>', '</mark>') AS title_html,
+           snippet(memories_fts, 1, '<mark>', '</mark>', '…', 16) AS snippet,
+           bm25(memories_fts, 10.0, 1.0, 4.0, 0.0) AS score
+    FROM memories_fts
+    JOIN memories m ON m.id = memories_fts.rowid
+    WHERE memories_fts MATCH :match AND m.user_id = :user_id
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
 
 
 # Backend API definition core: Put similar functionality "memory cards (memories)" under the same URL namespace, use HTTP methods to express actions
@@ -12,15 +45,250 @@ def _ok(payload,status=200):
 def _err(message,status=400):
     return jsonify({"error":message}),status
 
+def _encode_cursor(created_at, memory_id):
+    raw = f"{created_at.isoformat()}|{memory_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(token):
+    """Opaque cursor -> (created_at, id) of the last row on the previous page"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, memory_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(memory_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def _list_validators(user_id):
+    """ETag and Last-Modified for the user's whole list, from one aggregate query (no ORM rows)"""
+    last_deleted = db.session.query(func.max(MemoryTombstone.deleted_at)) \
+        .filter(MemoryTombstone.user_id == user_id).scalar_subquery()
+    latest, total, deleted = db.session.query(
+        func.max(Memories.updated_at), func.count(Memories.id), last_deleted
+    ).filter(Memories.user_id == user_id).one()
+    # count is part of the tag because a delete does not move max(updated_at); If-Modified-Since has no tag,
+    # so Last-Modified also moves with the newest tombstone
+    seed = f"{user_id}:{latest.isoformat() if latest else ''}:{total}:{request.query_string.decode()}"
+    last_modified = max((t for t in (latest, deleted) if t), default=None)
+    return hashlib.sha1(seed.encode()).hexdigest(), last_modified
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins when both are sent (RFC 9110 13.2.2): the tag also sees deletes within the same second
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache"    # Always revalidate, 304 is cheap
+    return response
+
+def _fts_query(raw, user_id):
+    """Free text -> safe FTS5 expression: every word quoted and prefix-matched, all words required, searched in
+    the text columns of this user's cards only ("" when there is nothing to search)"""
+    tokens = _TOKEN_RE.findall(raw or "")
+    if not tokens:
+        return ""
+    words = " ".join(f'"{t}"*' for t in tokens[:16])
+    return f'user_id:"{int(user_id)}" AND {{title content tags}}:({words})'
+
+def _replace_tags(*memories):
+    """Rewrite memory_tags rows for the given cards; caller commits (same transaction as the cards)"""
+    if not memories:
+        return
+    _drop_tags([m.id for m in memories])
+    rows = [{"user_id": m.user_id, "tag": t, "memory_id": m.id}
+            for m in memories for t in MemoryTag.normalize(m.tags)]
+    if rows:
+        db.session.execute(MemoryTag.__table__.insert(), rows)     # executemany: one statement for all rows
+
+def _drop_tags(memory_ids):
+    if memory_ids:
+        MemoryTag.query.filter(MemoryTag.memory_id.in_(memory_ids)).delete(synchronize_session=False)
+
+def _bury(user_id, memory_ids):
+    """Record tombstones for deleted cards; caller commits (same transaction as the delete)"""
+    if not memory_ids:
+        return
+    now = datetime.utcnow()
+    _unbury(memory_ids)
+    db.session.execute(MemoryTombstone.__table__.insert(), [
+        {"memory_id": i, "user_id": user_id, "deleted_at": now} for i in memory_ids
+    ])
+
+def _unbury(memory_ids):
+    # SQLite may hand a deleted max(id) to the next insert; a live row must not keep its old tombstone
+    if memory_ids:
+        MemoryTombstone.query.filter(MemoryTombstone.memory_id.in_(memory_ids)).delete(synchronize_session=False)
+
+def _parse_watermark(raw):
+    ts = datetime.fromisoformat(raw)
+    if ts.tzinfo:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)     # Stored timestamps are naive UTC
+    return ts
+
+def _parse_new_memory(data):
+    """create_memory validation -> (Memories kwargs, error message)"""
+    title=(data.get("title") or "").strip()
+    content=(data.get("content") or "").strip()
+    # content can come from handwriting or speech-to-text, so content must exist but voice_file_path can be None
+    if not content or not title:
+        return None, "title and content are required"
+
+    tags = data.get("tags") or []
+    if not isinstance(tags, list):
+        return None, "tags must be a list"
+
+    return {
+        "title": title,
+        "content": content,
+        "tags": tags,
+        "is_favorite": bool(data.get("is_favorite", False)),
+        "voice_file_path": data.get("voice_file_path"),
+    }, None
+
+def _apply_memory_update(memory, data):
+    """update_memory rules applied in place -> (tags changed, error message); nothing is touched on error"""
+    if "tags" in data and data["tags"] is not None and not isinstance(data["tags"], list):
+        return False, "tags must be a list"
+
+    if "title" in data and isinstance(data["title"], str):
+        memory.title = data["title"].strip() or memory.title
+
+    if "content" in data and isinstance(data["content"], str):
+        memory.content = data["content"].strip() or memory.content
+
+    tags_changed = "tags" in data
+    if tags_changed:
+        memory.tags = data["tags"] or []
+
+    if "is_favorite" in data:
+        memory.is_favorite = bool(data["is_favorite"])
+
+    if "voice_file_path" in data:
+        # Allow setting to None
+        memory.voice_file_path = data["voice_file_path"]
+
+    memory.updated_at = datetime.utcnow()
+    return tags_changed, None
+
 def register(app):
     @app.route('/api/get_memory',methods=['GET'])
     @login_required
     def get_memory():
-        memory = Memories.query.filter_by(user_id=current_user.id).order_by(Memories.created_at.desc()).all()
-        json_memories = list(map(lambda x: x.to_json(), memory))
+        """List memory cards, newest first.
+        Optional keyset pagination: ?limit=N&cursor=<next_cursor from previous page>; without them the full list is returned.
+        Optional ?tag=X keeps only cards carrying that tag (resolved through memory_tags)."""
+        # Cached entry carries its own validators, so a hit skips even the aggregate query
+        cache_key = ("get_memory", request.query_string)
+        cached = list_cache.get(current_user.id, cache_key)
+        if cached is None:
+            version = list_cache.version(current_user.id)      # Before the query: a write after it skips the put
+            etag, last_modified = _list_validators(current_user.id)
+            if _not_modified(etag, last_modified):
+                return _with_validators(make_response("", 304), etag, last_modified)
+
+            limit = request.args.get("limit", type=int)
+            cursor = request.args.get("cursor")
+            if cursor and not limit:
+                limit = PAGE_DEFAULT
+
+            q = Memories.query.filter_by(user_id=current_user.id)
+            tag = (request.args.get("tag") or "").strip()
+            if tag:
+                q = q.filter(Memories.id.in_(
+                    db.select(MemoryTag.memory_id).where(MemoryTag.user_id == current_user.id, MemoryTag.tag == tag)
+                ))
+            if cursor:
+                try:
+                    created_at, memory_id = _decode_cursor(cursor)
+                except ValueError as e:
+                    return _err(str(e), 400)
+                q = q.filter(or_(
+                    Memories.created_at < created_at,
+                    and_(Memories.created_at == created_at, Memories.id > memory_id),
+                ))
+            # Same order as ix_memories_user_id_created_at_id, so SQLite reads the index without sorting
+            q = q.order_by(Memories.created_at.desc(), Memories.id.asc())
+
+            # Column tuples straight into the encoder, no Memories instances
+            q = project(q, Memories)
+            next_cursor = None
+            if limit:
+                limit = max(1, min(limit, PAGE_MAX))
+                json_memories = rows_to_json(q.limit(limit + 1).all(), Memories)
+                if len(json_memories) > limit:
+                    json_memories = json_memories[:limit]
+                    next_cursor = _encode_cursor(json_memories[-1]["created_at"], json_memories[-1]["id"])
+            else:
+                json_memories = rows_to_json(q.all(), Memories)
+
+            body = dumps({
+                "ok": True,
+                "data": json_memories,
+                "next_cursor": next_cursor
+            })
+            cached = (body, etag, last_modified)
+            list_cache.put(current_user.id, cache_key, cached, version)
+
+        body, etag, last_modified = cached
+        if _not_modified(etag, last_modified):
+            return _with_validators(make_response("", 304), etag, last_modified)
+        return _with_validators(Response(body, mimetype="application/json"), etag, last_modified)
+
+    @app.route('/api/search_memory', methods=['GET'])
+    @login_required
+    def search_memory():
+        """Full-text search over title/content/tags, ranked by bm25. ?q=...&limit=&offset="""
+        match = _fts_query(request.args.get("q"), current_user.id)
+        if not match:
+            return _err("q is required", 400)
+        limit = max(1, min(request.args.get("limit", SEARCH_PAGE_DEFAULT, type=int), SEARCH_PAGE_MAX))
+        offset = max(0, request.args.get("offset", 0, type=int))
+
+        try:
+            rows = db.session.execute(_SEARCH_SQL, {
+                "match": match, "user_id": current_user.id, "limit": limit + 1, "offset": offset,
+            }).all()
+        except OperationalError as e:
+            db.session.rollback()
+            app.logger.exception("search_memory_failed")
+            return _err(f"search unavailable: {e.orig}", 503)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        # One IN query for the page instead of hydrating every match
+        by_id = {m.id: m for m in Memories.query.filter(Memories.id.in_([r.id for r in rows])).all()} if rows else {}
+        results = []
+        for r in rows:
+            memory = by_id.get(r.id)
+            if not memory:
+                continue
+            item = memory.to_json()
+            item.update({"title_html": r.title_html, "snippet": r.snippet, "score": r.score})
+            results.append(item)
+
+        return _ok({
+            "ok": True,
+            "data": results,
+            "next_offset": offset + limit if has_more else None
+        })
+
+    @app.route('/api/memory_tags', methods=['GET'])
+    @login_required
+    def memory_tag_counts():
+        """Tag facet counts for the current user, straight from the memory_tags primary key"""
+        rows = db.session.query(MemoryTag.tag, func.count(MemoryTag.memory_id)) \
+            .filter(MemoryTag.user_id == current_user.id) \
+            .group_by(MemoryTag.tag) \
+            .order_by(func.count(MemoryTag.memory_id).desc(), MemoryTag.tag.asc()) \
+            .all()
         return _ok({
             "ok": True,
-            "data": json_memories
+            "data": [{"tag": tag, "count": n} for tag, n in rows]
         })
 
     @app.route('/api/create_memory', methods=['POST','OPTIONS'])
@@ -29,25 +297,19 @@ def register(app):
         if request.method == "OPTIONS":
             pass
 
-        data=request.get_json()
-        title=(data.get("title") or "").strip()
-        content=(data.get("content") or "").strip()
-        # content can come from handwriting or speech-to-text, so content must exist but voice_file_path can be None
-        if not content or not title:
-            return _err("title and content are required", 400)
-
-        tags = data.get("tags") or []
-        if not isinstance(tags, list):
-            return _err("tags must be a list", 400)
+        fields, error = _parse_new_memory(request.get_json() or {})
+        if error:
+            return _err(error, 400)
 
-        is_favorite=bool(data.get("is_favorite",False))
-        voice_file_path=data.get("voice_file_path")
-
-        new_memory=Memories(user_id=current_user.id,title=title,content=content,tags=tags,voice_file_path=voice_file_path,is_favorite=is_favorite)
+        new_memory=Memories(user_id=current_user.id, **fields)
 
         try:
             db.session.add(new_memory)
+            db.session.flush()      # Need the id for memory_tags
+            _replace_tags(new_memory)
+            _unbury([new_memory.id])
             db.session.commit()
+            list_cache.bump(current_user.id)
 
         except Exception as e:
             db.session.rollback()
@@ -66,34 +328,15 @@ def register(app):
         if not memory:
             return _err("memory not found",400)
 
-        data = request.get_json()
-
-        if "title" in data and isinstance(data["title"], str):
-            memory.title = data["title"].strip() or memory.title
-
-        if "content" in data and isinstance(data["content"], str):
-            memory.content = data["content"].strip() or memory.content
-
-        if "tags" in data:
-            if data["tags"] is None:
-                memory.tags = []
-            elif isinstance(data["tags"], list):
-                memory.tags = data["tags"]
-            else:
-                return _err("tags must be a list", 400)
-
-        if "is_favorite" in data:
-            memory.is_favorite = bool(data["is_favorite"])
-
-        if "voice_file_path" in data:
-            # Allow setting to None
-            memory.voice_file_path = data["voice_file_path"]
-
-
-        memory.updated_at = datetime.utcnow()
+        tags_changed, error = _apply_memory_update(memory, request.get_json() or {})
+        if error:
+            return _err(error, 400)
 
         try:
+            if tags_changed:
+                _replace_tags(memory)
             db.session.commit()
+            list_cache.bump(current_user.id)
         except Exception as e:
             db.session.rollback()
             return _err(str(e), 400)
@@ -112,8 +355,11 @@ def register(app):
             return _err("memory not found",404)
 
         try:
+            _drop_tags([memory.id])
+            _bury(memory.user_id, [memory.id])
             db.session.delete(memory)
             db.session.commit()
+            list_cache.bump(current_user.id)
         except Exception as e:
             db.session.rollback()
             return _err(str(e), 400)
@@ -123,6 +369,142 @@ def register(app):
             "data": {"message": "deleted"}
         }, 200)
 
+    @app.route('/api/memories/batch', methods=['POST'])
+    @login_required
+    def batch_memory():
+        """Mixed create/update/delete applied in ONE transaction (one commit/fsync per batch).
+        Body: {"ops": [{"op": "create", "data": {...}}, {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}
+        Items failing validation are reported and skipped; the rest commit together."""
+        ops = (request.get_json(silent=True) or {}).get("ops")
+        if not isinstance(ops, list) or not ops:
+            return _err("ops must be a non-empty list", 400)
+        if len(ops) > BATCH_MAX:
+            return _err(f"at most {BATCH_MAX} ops per batch", 413)
+
+        # Every card the batch touches, loaded with one IN query
+        target_ids = {op.get("id") for op in ops if isinstance(op, dict) and op.get("op") in ("update", "delete")}
+        target_ids = [i for i in target_ids if isinstance(i, int)]
+        owned = {m.id: m for m in Memories.query.filter(
+            Memories.user_id == current_user.id, Memories.id.in_(target_ids)).all()} if target_ids else {}
+
+        results = [None] * len(ops)
+        created, updated, deleted = [], [], {}      # deleted: id -> op index
+        for i, op in enumerate(ops):
+            kind = op.get("op") if isinstance(op, dict) else None
+            if kind == "create":
+                fields, error = _parse_new_memory(op.get("data") or {})
+                if error:
+                    results[i] = {"index": i, "ok": False, "error": error}
+                    continue
+                created.append((i, Memories(user_id=current_user.id, **fields)))
+            elif kind in ("update", "delete"):
+                memory = owned.get(op.get("id"))
+                if memory is None or memory.id in deleted:
+                    results[i] = {"index": i, "ok": False, "error": "memory not found"}
+                    continue
+                if kind == "delete":
+                    deleted[memory.id] = i
+                    continue
+                tags_changed, error = _apply_memory_update(memory, op.get("data") or {})
+                if error:
+                    results[i] = {"index": i, "ok": False, "error": error}
+                    continue
+                updated.append((i, memory, tags_changed))
+            else:
+                results[i] = {"index": i, "ok": False, "error": "op must be create, update or delete"}
+
+        try:
+            db.session.add_all([m for _, m in created])
+            # Creates go out as multi-row INSERTs where the driver can return ids in order (per row on SQLite),
+            # edits as one executemany UPDATE; either way nothing is fsynced until the single commit below
+            db.session.flush()
+            _unbury([m.id for _, m in created])
+            if deleted:
+                _drop_tags(list(deleted))
+                _bury(current_user.id, list(deleted))
+                Memories.query.filter(Memories.id.in_(list(deleted))).delete(synchronize_session=False)
+                for memory_id in deleted:
+                    db.session.expunge(owned[memory_id])
+            _replace_tags(*[m for _, m in created],
+                          *[m for _, m, changed in updated if changed and m.id not in deleted])
+
+            # Serialize before commit: afterwards every instance is expired and would be re-SELECTed one by one
+            for i, memory in created:
+                results[i] = {"index": i, "ok": True, "op": "create", "data": memory.to_json()}
+            for i, memory, _ in updated:
+                # Updated then deleted later in the same batch -> only the id is left to report
+                data = {"id": memory.id} if memory.id in deleted else memory.to_json()
+                results[i] = {"index": i, "ok": True, "op": "update", "data": data}
+            for memory_id, i in deleted.items():
+                results[i] = {"index": i, "ok": True, "op": "delete", "data": {"id": memory_id}}
+
+            db.session.commit()
+            list_cache.bump(current_user.id)
+        except Exception as e:
+            db.session.rollback()
+            return _err(str(e), 400)
+
+        return _ok({
+            "ok": True,
+            "applied": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "results": results
+        })
+
+    @app.route('/api/memories/changes', methods=['GET'])
+    @login_required
+    def memory_changes():
+        """Delta sync: ?since=<watermark from the previous call>&limit=N
+        Returns cards whose updated_at is newer than the watermark plus tombstones for cards deleted since then,
+        and the next watermark. Without since it is a full snapshot (no tombstones). Repeat while has_more."""
+        since = None
+        if request.args.get("since"):
+            try:
+                since = _parse_watermark(request.args["since"])
+            except ValueError:
+                return _err("since must be a watermark returned by this endpoint", 400)
+        limit = max(1, min(request.args.get("limit", SYNC_PAGE_DEFAULT, type=int), SYNC_PAGE_MAX))
+        until = datetime.utcnow() - SYNC_LAG
+
+        # Both range scans ride (user_id, updated_at) / (user_id, deleted_at) indexes
+        def changed_between(ts_filter):
+            return Memories.query.filter(Memories.user_id == current_user.id, *ts_filter) \
+                .order_by(Memories.updated_at, Memories.id)
+
+        def deleted_between(ts_filter):
+            return MemoryTombstone.query.filter(MemoryTombstone.user_id == current_user.id, *ts_filter) \
+                .order_by(MemoryTombstone.deleted_at, MemoryTombstone.memory_id)
+
+        window = [Memories.updated_at <= until] + ([Memories.updated_at > since] if since else [])
+        changed = changed_between(window).limit(limit + 1).all()
+        deleted = []
+        if since:
+            deleted = deleted_between([MemoryTombstone.deleted_at <= until,
+                                       MemoryTombstone.deleted_at > since]).limit(limit + 1).all()
+
+        events = sorted([(m.updated_at, m) for m in changed] + [(t.deleted_at, t) for t in deleted],
+                        key=lambda e: e[0])
+        has_more = len(events) > limit
+        if has_more:
+            # Cut the page at a timestamp boundary and re-read that exact instant in full,
+            # so rows sharing the watermark are never split across two pages
+            cut = events[limit - 1][0]
+            changed = [m for ts, m in events if ts < cut and isinstance(m, Memories)] \
+                + changed_between([Memories.updated_at == cut]).all()
+            deleted = [t for ts, t in events if ts < cut and isinstance(t, MemoryTombstone)] \
+                + (deleted_between([MemoryTombstone.deleted_at == cut]).all() if since else [])
+            watermark = cut
+        else:
+            watermark = max(until, since) if since else until
+
+        return _ok({
+            "ok": True,
+            "data": [m.to_json() for m in changed],
+            "deleted": [t.to_json() for t in deleted],
+            "watermark": watermark.isoformat(),
+            "has_more": has_more
+        })
+
     # Handle OPTIONS (preflight) requests before formal POST requests
     @app.before_request
     def handle_preflight():
@@ -1,30 +1,66 @@
-from flask import request, jsonify
+from flask import Response, request, jsonify
 from flask_login import login_required, current_user
 from backend.config import db
-from backend.models.quiz_model import QuizQuestion, QuizAttempt, WrongQuestion
-from sqlalchemy.sql import func
+from backend.models.quiz_model import QuizAttempt, WrongQuestion
+from backend.quiz_bank import question_bank
+from backend import quiz_review, quiz_stats
+from sqlalchemy import func, insert, select, tuple_, update
+from datetime import datetime
+import base64
+
+PAGE_DEFAULT = 50
+PAGE_MAX = 200
 
 def _ok(p, status=200): return jsonify(p), status
 def _err(msg, status=400): return jsonify({"error": msg}), status
 
+def _encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(token):
+    """Opaque cursor -> (created_at, id) of the last entry on the previous page"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+def _page(rows, limit, key):
+    """rows fetched with limit + 1 -> (page, next_cursor or None); key(row) -> (created_at, id)"""
+    limit = max(1, min(limit, PAGE_MAX))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(*key(rows[-1]))
+
 def register(app):
 
     # Compatible with old paths from your screenshots, also provide more semantic new paths
     @app.route("/api/create_quiz", methods=["GET"])
     @login_required
     def quiz_start():
-        """Start a quiz: exclusive for logged-in users"""
+        """Start a quiz: exclusive for logged-in users.
+        ?mode=due puts the questions due for spaced-repetition review first and tops up with random ones."""
         count = int(request.args.get("count") or 5)
+        questions, due_count = [], 0
+        if request.args.get("mode") == "due":
+            due_ids = quiz_review.due(current_user.id, datetime.utcnow(), count)
+            questions = [q.public for q in map(question_bank.get, due_ids) if q]    # Skip removed questions
+            due_count = len(questions)
+            exclude = set(due_ids)
+        else:
+            exclude = ()
+        # Random pick from the in-memory bank (backend/quiz_bank.py): O(count), no ORDER BY RANDOM() table sort
+        questions += question_bank.sample(count - len(questions), exclude)
 
-        attempt = QuizAttempt(user_id=current_user.id, score=0, total=count)
+        attempt = QuizAttempt(user_id=current_user.id, score=0, total=len(questions))
         db.session.add(attempt)
         db.session.commit()
 
-        qs = QuizQuestion.query.order_by(func.random()).limit(count).all()
-        return _ok({
-            "attempt_id": attempt.id,
-            "questions": [q.to_public_json() for q in qs],
-        })
+        body = b'{"attempt_id":%d,"due":%d,"questions":[%s]}' % (attempt.id, due_count, b",".join(questions))
+        return Response(body, mimetype="application/json")
 
     @app.route("/api/check_quiz", methods=["POST"])
     @login_required
@@ -32,13 +68,13 @@ def register(app):
         data = request.get_json() or {}
         qid = int(data.get("question_id"))
         selected = int(data.get("selected_index"))
-        q = QuizQuestion.query.get(qid)
+        q = question_bank.get(qid)
         if not q:
             return _err("question not found", 404)
         return _ok({
             "correct": (selected == q.answer_index),
             "correct_index": q.answer_index,
-            "explanation": q.explanation or "",
+            "explanation": q.explanation,
         })
 
     @app.route("/api/submit_quiz", methods=["POST"])
@@ -48,43 +84,125 @@ def register(app):
         attempt_id = int(data.get("attempt_id") or 0)
         answers = data.get("answers") or []
 
-        attempt = QuizAttempt.query.get(attempt_id)
+        attempt = db.session.get(QuizAttempt, attempt_id)
         if not attempt:
             return _err("attempt not found", 404)
         if attempt.user_id != current_user.id:
             return _err("forbidden", 403)
+        try:
+            # One answer per question (the last one sent wins): a repeated qid must not be scored, rolled up or
+            # rescheduled twice
+            picked = {int(item["question_id"]): int(item.get("selected_index", -1)) for item in answers}
+        except (KeyError, TypeError, ValueError):
+            return _err("answers must be a list of {question_id, selected_index}", 400)
 
+        # Questions come from the shared bank, so scoring costs no queries however long the quiz is
         score = 0
-        for item in answers:
-            q = QuizQuestion.query.get(int(item["question_id"]))
+        wrongs, results, outcomes = [], {}, []
+        stamp = datetime.utcnow()
+        for qid, sel in picked.items():
+            q = question_bank.get(qid)
             if not q:
                 continue
-            sel = int(item.get("selected_index", -1))
+            results[qid] = sel == q.answer_index
+            outcomes.append((qid, sel == q.answer_index))
             if sel == q.answer_index:
                 score += 1
             else:
-                db.session.add(WrongQuestion(
-                    attempt_id=attempt.id,
-                    user_id=current_user.id,          # Record ownership
-                    qid=q.qid,
-                    question_text=q.text,
-                    options=q.options,
-                    correct_index=q.answer_index,
-                    selected_index=sel,
-                ))
-        attempt.score = score
-        attempt.total = attempt.total or len(answers)
+                wrongs.append({
+                    "attempt_id": attempt.id,
+                    "user_id": current_user.id,          # Record ownership
+                    "qid": q.qid,
+                    "question_text": q.text,
+                    "options": q.options,
+                    "correct_index": q.answer_index,
+                    "selected_index": sel,
+                    "created_at": stamp,
+                })
+        # Claim the attempt before writing anything else: a resubmit (double click, client retry) must not count
+        # the same answers into the review schedule, the rollups and the wrong list a second time
+        total = attempt.total or len(picked)
+        claimed = db.session.execute(
+            update(QuizAttempt)
+            .where(QuizAttempt.id == attempt.id, QuizAttempt.submitted_at.is_(None))
+            .values(score=score, total=total, submitted_at=stamp)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != 1:
+            db.session.rollback()
+            return _err("attempt already submitted", 409)
+        if wrongs:
+            db.session.execute(insert(WrongQuestion), wrongs)      # One executemany for all misses
+        quiz_review.record(current_user.id, results, stamp)
+        quiz_stats.record(current_user.id, outcomes, stamp)
         db.session.commit()
-        return _ok({"score": score, "total": attempt.total})
+        return _ok({"score": score, "total": total})        # No reload of the expired attempt
+
+    @app.route("/api/quiz_stats", methods=["GET"])
+    @login_required
+    def quiz_progress():
+        """Progress of the current user from the rollup tables: totals, streaks, rolling accuracy and the
+        ?weakest=N (default 10, max 100) questions with the lowest rolling accuracy"""
+        weakest = request.args.get("weakest", default=10, type=int)
+        if weakest is None or not 0 <= weakest <= 100:
+            return _err("weakest must be 0..100", 400)
+        return _ok(quiz_stats.user_stats(current_user.id, weakest))
 
     @app.route("/api/wrong_quiz", methods=["GET"])
     @login_required
     def quiz_wrongs():
-        """Wrong question cards for current logged-in user; optionally filter by attempt_id for most recent"""
+        """Wrong question cards for current logged-in user, newest first; optionally filter by attempt_id.
+        Keyset pagination: ?limit=N&cursor=<next_cursor from previous page> -> {"data", "next_cursor"};
+        without them the full list is returned.
+        ?group=qid: one entry per question (its latest miss) with "misses" and "last_missed_at", always paged."""
         attempt_id = request.args.get("attempt_id", type=int)
-        q = WrongQuestion.query.filter_by(user_id=current_user.id)
+        grouped = request.args.get("group") == "qid"
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+        if (cursor or grouped) and not limit:
+            limit = PAGE_DEFAULT
+        if cursor:
+            try:
+                after = _decode_cursor(cursor)
+            except ValueError as e:
+                return _err(str(e), 400)
+        else:
+            after = None
+
+        where = [WrongQuestion.user_id == current_user.id]
         if attempt_id:
-            q = q.filter_by(attempt_id=attempt_id)
-        items = q.order_by(WrongQuestion.created_at.desc()).all()
-        return _ok([it.to_json() for it in items])
+            where.append(WrongQuestion.attempt_id == attempt_id)
+
+        if grouped:
+            # GROUP BY over ix_wrong_questions_user_id_qid_created_at; max(id) is the latest miss of each question.
+            # Cost: every page aggregates the user's whole miss history and sorts the groups in a temp B-tree,
+            # i.e. O(misses) per page rather than O(limit). Fine for the few thousand misses a user collects; if
+            # that grows, keep a per-(user, qid) latest-miss row updated in quiz_submit and page over its index.
+            last_missed = func.max(WrongQuestion.created_at)
+            last_id = func.max(WrongQuestion.id)
+            groups = select(WrongQuestion.qid, func.count().label("misses"), last_missed.label("last_missed_at"),
+                            last_id.label("last_id")).where(*where).group_by(WrongQuestion.qid)
+            if after:
+                groups = groups.having(tuple_(last_missed, last_id) < tuple_(*after))
+            groups = groups.order_by(last_missed.desc(), last_id.desc()).limit(max(1, min(limit, PAGE_MAX)) + 1) \
+                .subquery()
+            rows = db.session.execute(
+                select(WrongQuestion, groups.c.misses, groups.c.last_missed_at)
+                .join(groups, WrongQuestion.id == groups.c.last_id)
+                .order_by(groups.c.last_missed_at.desc(), groups.c.last_id.desc())).all()
+            rows, next_cursor = _page(rows, limit, lambda row: (row[2], row[0].id))
+            return _ok({"data": [{**w.to_json(), "misses": misses,
+                                  "last_missed_at": last.isoformat() if last else None} for w, misses, last in rows],
+                        "next_cursor": next_cursor})
 
+        q = WrongQuestion.query.filter(*where)
+        if after:
+            # One row value, so SQLite ranges the index on (user_id=? AND created_at<?) instead of only user_id
+            q = q.filter(tuple_(WrongQuestion.created_at, WrongQuestion.id) < tuple_(*after))
+        # Same order as ix_wrong_questions_user_id_created_at_id read backwards: no sort
+        q = q.order_by(WrongQuestion.created_at.desc(), WrongQuestion.id.desc())
+        if not limit:
+            return _ok([it.to_json() for it in q.all()])
+        rows, next_cursor = _page(q.limit(max(1, min(limit, PAGE_MAX)) + 1).all(), limit,
+                                  lambda w: (w.created_at, w.id))
+        return _ok({"data": [it.to_json() for it in rows], "next_cursor": next_cursor})
@@ -1,10 +1,10 @@
 # backend/routes/registration.py
 from flask import request, jsonify,make_response,redirect
 from flask_login import login_user, logout_user, login_required, current_user
-from backend.config import db, mail
+from backend.config import db
 from backend.models.user_model import User
+from backend.notifications import enqueue
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_mail import Message
 import time, secrets
 from flask_login import login_user
 # --- add imports ---
@@ -76,20 +76,16 @@ def register(app):
 
         code = f"{secrets.randbelow(900000) + 100000}"  # Six digits
         user.set_pin_with_expiry(code, ttl_minutes=10)
-        db.session.commit()
 
+        # Only queued here (same commit as the PIN); backend/outbox.py delivers it
         try:
-            msg = Message("Your login PIN", recipients=[email])
-            msg.body = f"Your login code is: {code}\n(Valid for 10 minutes)"
-            mail.send(msg)
-        except UnicodeEncodeError as e:
-            bad = e.object[e.start:e.end]
-            print("bad frag:", repr(bad), "codes:", [f"U+{ord(c):04X}" for c in bad])
-            return _err("send mail failed: non-ASCII char in email address", 400)
+            enqueue([email], "Your login PIN", f"Your login code is: {code}\n(Valid for 10 minutes)", kind="pin")
+            db.session.commit()
         except Exception as e:
+            db.session.rollback()
             return _err(f"send mail failed: {e}", 500)
 
-        return _ok({"sent": True})
+        return _ok({"sent": True, "queued": True})
 
     @app.route("/api/verify_pin", methods=["POST"])
     def verify_pin():
@@ -249,13 +245,14 @@ def register(app):
         _PIN_CODES[current_user.id] = {"code": code, "exp": time.time() + _CODE_TTL_SEC}
 
         try:
-            msg = Message("PIN reset code", recipients=[email])
-            msg.body = f"Your verification code is: {code}\n(Valid for 10 minutes)"
-            mail.send(msg)
+            enqueue([email], "PIN reset code", f"Your verification code is: {code}\n(Valid for 10 minutes)",
+                    kind="pin_reset")
+            db.session.commit()
         except Exception as e:
+            db.session.rollback()
             return _err(f"send mail failed: {e}", 500)
 
-        return _ok({"sent": True})
+        return _ok({"sent": True, "queued": True})
 
     # ---------------- Confirm PIN reset ----------------
     @app.route("/api/pin_reset_confirm", methods=["POST"])
@@ -1,13 +1,25 @@
 from backend.config import db
-from flask import request,jsonify,make_response
+from flask import request,jsonify,make_response,Response,stream_with_context
 from flask_login import login_required, current_user
 from backend.models.reminder_model import Reminder
-from datetime import datetime,timedelta
-import os,uuid,traceback
+from datetime import date,datetime,timedelta
+import io,os,traceback
 from werkzeug.utils import secure_filename
-from flask_mail import Message
-from email.header import Header
-from backend.config import mail
+from backend.notifications import enqueue, enqueue_reminder
+from backend.recurrence import rule_fields
+from backend.reminder_import import parse_new_reminder, import_reminders, detect_format, READERS
+from backend.dispatcher import now
+import heapq, itertools
+from sqlalchemy import and_, or_
+from backend.events import reminder_events
+from backend import adherence
+from backend.models.adherence_model import ReminderOccurrence
+import queue
+from backend.cache import list_cache
+from backend.serializers import dumps, project, rows_to_json
+from backend import media_store
+from backend.media_derivatives import derivative_pool
+from backend.routes.media import media_url
 
 
 
@@ -17,17 +29,89 @@ def _ok(payload,status=200):    # Unified response payload for frontend
 def _err(message,status=400):
     return jsonify({'error':message}),status
 
+# /api/reminders/occurrences: widest window and most occurrences per response
+OCCURRENCE_WINDOW_MAX = timedelta(days=92)
+OCCURRENCE_LIMIT_MAX = 2000
+
+
 def register(app):
     # Add/delete reminder tasks
     @app.route('/api/get_reminder',methods=['GET'])
     @login_required
     def get_reminders():
-        reminders = Reminder.query.filter_by(user_id=current_user.id).order_by(Reminder.scheduled_at.asc()).all()
-        json_reminders = list(map(lambda x:x.to_json(),reminders))
-        return _ok({
-            "ok": True,
-            "data": json_reminders
-        })
+        body = list_cache.get(current_user.id, "get_reminder")
+        if body is None:
+            version = list_cache.version(current_user.id)      # Before the query: a write after it skips the put
+            q = Reminder.query.filter_by(user_id=current_user.id).order_by(Reminder.scheduled_at.asc())
+            json_reminders = rows_to_json(project(q, Reminder).all(), Reminder)
+            body = dumps({
+                "ok": True,
+                "data": json_reminders
+            })
+            list_cache.put(current_user.id, "get_reminder", body, version)
+        return Response(body, mimetype="application/json")
+
+    @app.route('/api/reminders/stream', methods=['GET'])
+    @login_required
+    def reminder_stream():
+        """Server-Sent Events: "due" when a reminder's next_run_at arrives, "updated" on snooze/done/edits.
+        Replaces polling /api/get_reminder; on 503 (stream cap reached) clients keep polling."""
+        user_id = current_user.id
+        q = reminder_events.subscribe(user_id)
+        if q is None:
+            return _err("too many open streams, poll /api/get_reminder instead", 503)
+        keepalive = app.config.get("SSE_KEEPALIVE", 15)
+        db.session.close()      # Don't pin a pooled DB connection for the lifetime of the stream
+
+        def events():
+            try:
+                yield "retry: 5000\n\n"
+                while True:
+                    try:
+                        event, data = q.get(timeout=keepalive)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+            finally:
+                reminder_events.unsubscribe(user_id, q)     # Client went away
+
+        return Response(stream_with_context(events()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.route('/api/reminders/occurrences', methods=['GET'])
+    @login_required
+    def reminder_occurrences():
+        """Planned fire times in [from, to) across the user's active reminders, ascending.
+        ?from=&to= are local ISO datetimes (default: now .. +7 days, at most 92 days); ?limit= caps the list.
+        Each series is expanded lazily and merged, so only the window is ever materialized."""
+        try:
+            lo = datetime.fromisoformat(request.args["from"]) if request.args.get("from") else now()
+            hi = datetime.fromisoformat(request.args["to"]) if request.args.get("to") else lo + timedelta(days=7)
+        except ValueError:
+            return _err("from/to must be ISO datetime strings", 400)
+        if hi <= lo or hi - lo > OCCURRENCE_WINDOW_MAX:
+            return _err(f"to must be after from and at most {OCCURRENCE_WINDOW_MAX.days} days later", 400)
+        limit = min(max(request.args.get("limit", 500, type=int), 1), OCCURRENCE_LIMIT_MAX)
+
+        reminders = Reminder.query.filter(
+            Reminder.user_id == current_user.id,
+            Reminder.is_active.is_(True),
+            Reminder.scheduled_at < hi,
+            or_(Reminder.repeat_until.is_(None), Reminder.repeat_until >= lo),
+            or_(Reminder.scheduled_at >= lo, Reminder.repeat_rule.in_(("DAILY", "WEEKLY", "MONTHLY"))),
+        ).all()
+
+        def series(r):
+            for at in r.occurrences(lo, hi):
+                yield at, r.rid, r
+
+        merged = heapq.merge(*map(series, reminders), key=lambda item: item[:2])
+        items = list(itertools.islice(merged, limit + 1))
+        data = [{"rid": r.rid, "at": at.isoformat(), "title": r.title, "reminder_type": r.reminder_type}
+                for at, _, r in items[:limit]]
+        return _ok({"ok": True, "data": data, "from": lo.isoformat(), "to": hi.isoformat(),
+                    "truncated": len(items) > limit})
 
     @app.route('/api/create_reminder',methods=['POST','OPTIONS'])
     @login_required
@@ -37,43 +121,17 @@ def register(app):
             return _ok({"ok":True})
 
         data = request.get_json() or {}
-        title = (data.get('title') or "").strip()     # Task description
-        description = (data.get("description") or "").strip()
-        channels = data.get('channels') or []          # Reminder channels
-        recipient_email = (data.get('recipient_email') or "").strip()
-        reminder_type = (data.get('reminder_type') or "general").strip()
-
-        scheduled_at = data.get('scheduled_at')
-        repeat_rule = (data.get('repeat_rule') or "").strip() or None
-        repeat_interval = int(data.get('repeat_interval') or 1)
-        is_active = bool(data.get('is_active', True))
+        fields, error = parse_new_reminder(data)
+        if error:
+            return _err(error, 400)
 
-        if not title or not scheduled_at or not channels:
-            return _err("title, scheduled_at and channels are required", 400)
-
-        try:
-            when = datetime.fromisoformat(scheduled_at)
-        except Exception:
-            return _err("scheduled_at must be ISO datetime string", 400)
-
-        new_reminder = Reminder(
-            user_id=current_user.id,
-            title=title,
-            description=description,
-            scheduled_at=when,
-            repeat_rule=repeat_rule,
-            repeat_interval=repeat_interval,
-            is_active=is_active,
-            channels=channels,
-            recipient_email=recipient_email,
-            next_run_at=when,
-            media_paths=[],
-            reminder_type=reminder_type
-        )
+        new_reminder = Reminder(user_id=current_user.id, **fields)
+        new_reminder.next_run_at = new_reminder.first_run_at(now())
 
         try:
             db.session.add(new_reminder)
             db.session.commit()
+            list_cache.bump(current_user.id)
 
         except Exception as e:
             db.session.rollback()
@@ -85,6 +143,30 @@ def register(app):
         }, 201)
 
 
+    @app.route('/api/reminders/import', methods=['POST'])
+    @login_required
+    def import_reminders_route():
+        """Bulk create from a CSV or .ics file (multipart "file" or raw body), streamed and committed in chunks.
+        ?format=csv|ics (default: from the file name / Content-Type), ?channels=alarm,email for rows without any.
+        Per-row problems come back as {"line", "error"}; valid rows are imported regardless."""
+        request.max_content_length = app.config.get("REMINDER_IMPORT_MAX")
+        upload = request.files.get("file")
+        if upload:
+            stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+        else:
+            stream, fmt = request.stream, detect_format(mimetype=request.mimetype)
+        fmt = (request.args.get("format") or fmt or "").lower()
+        if fmt not in READERS:
+            return _err("format must be csv or ics", 400)
+        channels = [c.strip() for c in (request.args.get("channels") or "alarm").split(",") if c.strip()]
+
+        lines = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="strict", newline="")
+        report = import_reminders(READERS[fmt](lines), current_user.id, now(), default_channels=channels)
+        if report["imported"]:
+            list_cache.bump(current_user.id)
+        return _ok({"ok": "error" not in report, **report})
+
+
     @app.route('/api/update_reminder/<int:rid>',methods=['PATCH'])
     @login_required
     def update_reminder(rid):
@@ -94,10 +176,16 @@ def register(app):
 
         data = request.get_json() or {}
 
-        for k in ("title", "description", "recipient_email", "repeat_rule", "reminder_type"):
+        for k in ("title", "description", "recipient_email", "reminder_type"):
             if k in data:
                 setattr(reminder, k, (data[k] or "").strip() or None)
 
+        rule, error = rule_fields(data)
+        if error:
+            return _err(error, 400)
+        for k, v in rule.items():
+            setattr(reminder, k, v)
+
         if "channels" in data:
             if data["channels"] is None:
                 reminder.channels = []
@@ -109,28 +197,42 @@ def register(app):
         if "scheduled_at" in data and data["scheduled_at"]:
             try:
                 reminder.scheduled_at = datetime.fromisoformat(data["scheduled_at"])
-                reminder.next_run_at = reminder.scheduled_at
             except Exception:
                 return _err("scheduled_at must be ISO datetime string", 400)
-
-        if "repeat_interval" in data:
-            try:
-                reminder.repeat_interval = int(data["repeat_interval"])
-            except Exception:
-                return _err("repeat_interval must be int", 400)
+        if rule or ("scheduled_at" in data and data["scheduled_at"]):
+            reminder.next_run_at = reminder.first_run_at(now())
 
         if "is_active" in data:
             reminder.is_active = bool(data["is_active"])
 
-        # Alarm completed or snooze reminder
-        if data.get("action") == "done":
+        # Alarm completed or snooze reminder; both are logged against the dose they answer
+        action = data.get("action")
+        if action in ("done", "snooze"):
+            at = now()
+            try:
+                occurrence = datetime.fromisoformat(data["occurrence"]) if data.get("occurrence") \
+                    else adherence.current_occurrence(reminder, at)
+            except (TypeError, ValueError):
+                return _err("occurrence must be ISO datetime string", 400)
+        if action == "done":
             reminder.last_sent_at = datetime.utcnow()
-        if data.get("action") == "snooze":
-            reminder.next_run_at = (reminder.next_run_at or datetime.utcnow()) + timedelta(minutes=10)
-
+            if not adherence.already_done(reminder, occurrence):
+                adherence.record([adherence.event(reminder, "DONE", occurrence, at)])
+        if action == "snooze":
+            adherence.record([adherence.event(reminder, "SNOOZED", occurrence, at)])
+            # Ring again in 10 minutes. The series is anchored on scheduled_at, so when the dispatcher has already
+            # moved next_run_at to the next dose, that dose is restored after the re-fire instead of being pushed
+            reminder.next_run_at = at + timedelta(minutes=10)
+
+        if rule or data.get("scheduled_at") or "is_active" in data or action == "snooze":
+            # A dispatcher holding this row would write back the schedule it claimed; drop its lease so that
+            # write-back skips the row (dispatcher.dispatch_once) and the edit stands
+            reminder.claimed_by = None
+            reminder.claimed_until = None
         reminder.updated_at = datetime.utcnow()
         try:
             db.session.commit()
+            list_cache.bump(current_user.id)
         except Exception as e:
             db.session.rollback()
             return _err(str(e), 400)
@@ -141,6 +243,45 @@ def register(app):
         })
 
 
+    @app.route('/api/reminders/<int:rid>/history', methods=['GET'])
+    @login_required
+    def reminder_history(rid):
+        """Occurrence log of one reminder, newest first; pass back next_before/next_before_id to page"""
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        q = ReminderOccurrence.query.filter_by(user_id=current_user.id, reminder_id=rid)
+        if request.args.get("before"):
+            try:
+                before = datetime.fromisoformat(request.args["before"])
+            except ValueError:
+                return _err("before must be ISO datetime string", 400)
+            before_id = request.args.get("before_id", type=int)
+            if before_id is None:
+                q = q.filter(ReminderOccurrence.occurred_at < before)
+            else:
+                q = q.filter(or_(ReminderOccurrence.occurred_at < before,
+                                 and_(ReminderOccurrence.occurred_at == before, ReminderOccurrence.id < before_id)))
+        rows = q.order_by(ReminderOccurrence.occurred_at.desc(), ReminderOccurrence.id.desc()).limit(limit).all()
+        more = len(rows) == limit
+        return _ok({"ok": True, "data": [r.to_json() for r in rows],
+                    "next_before": rows[-1].occurred_at.isoformat() if more else None,
+                    "next_before_id": rows[-1].id if more else None})
+
+    @app.route('/api/adherence', methods=['GET'])
+    @login_required
+    def adherence_report():
+        """Daily fired/done/snoozed counts and done rate for ?from=&to= (dates, default: the last 30 days)"""
+        try:
+            last_day = date.fromisoformat(request.args["to"]) if request.args.get("to") else now().date()
+            first_day = date.fromisoformat(request.args["from"]) if request.args.get("from") \
+                else last_day - timedelta(days=29)
+        except ValueError:
+            return _err("from/to must be ISO dates (YYYY-MM-DD)", 400)
+        if first_day > last_day:
+            return _err("from must not be after to", 400)
+        payload = adherence.report(current_user.id, first_day, last_day)
+        return _ok({"ok": True, "from": first_day.isoformat(), "to": last_day.isoformat(), **payload})
+
+
     @app.route('/api/delete_reminder/<int:rid>',methods=['DELETE'])
     @login_required
     def delete_reminder(rid):
@@ -148,8 +289,10 @@ def register(app):
         if not reminder:
             return _err("reminder not found",404)
         try:
+            media_store.release(reminder.media_paths)
             db.session.delete(reminder)
             db.session.commit()
+            list_cache.bump(current_user.id)
         except Exception as e:
             db.session.rollback()   # Rollback transaction to avoid session pollution
             return _err(str(e), 400)
@@ -183,27 +326,36 @@ def register(app):
             return _err("file type not allowed", 400)
 
         folder = app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(folder, exist_ok=True)
-        ext = os.path.splitext(f.filename)[1].lower()
-        fname = f"{uuid.uuid4().hex}{ext}"
-        safe_name = secure_filename(fname)
-        path = os.path.join(folder, safe_name)
-        f.save(path)
+        ext = os.path.splitext(secure_filename(f.filename))[1].lower()
+        # Hashed while streaming to disk; identical bytes already in the store are not written twice
+        blob, created = media_store.store(f.stream, ext, folder)
+        content_id = blob.sha256
+
+        refs = reminder.media_paths or []
+        if content_id in refs:
+            # Same file re-attached to the same reminder: nothing to do
+            return _ok({"path": content_id, "content_id": content_id, "url": media_url(content_id),
+                        "deduplicated": True}, 200)
 
         try:
-            reminder.media_paths = (reminder.media_paths or []) + [path]
+            media_store.add_ref(blob)
+            reminder.media_paths = refs + [content_id]
+            if not reminder.alarm_sound and blob.ext.lower() in media_store.AUDIO_EXTS:
+                reminder.alarm_sound = blob.rel_path        # Just written, no need to look at the disk
             reminder.updated_at = datetime.utcnow()
             db.session.commit()
+            list_cache.bump(current_user.id)
         except Exception as e:
+            # The file stays: another upload may reference the same content; the media GC removes it otherwise
             db.session.rollback()
-            # Saved files can be deleted here to avoid "saved but not written to DB", here's the approach:
-            try:
-                os.remove(path)
-            except Exception:
-                pass
             return _err(str(e), 400)
 
-        return _ok({"path": path}, 201)     # Frontend temporarily cannot access due to no file path, can test on backend
+        # Thumbnail/display sizes are rendered in the background and show up in media_derivatives
+        derivative_pool.submit(blob, reminder.rid)
+
+        # media_paths entries are content ids now; the file itself is served by /api/media/<content_id>
+        return _ok({"path": content_id, "content_id": content_id, "url": media_url(content_id),
+                    "deduplicated": not created}, 201)
 
 
     @app.route("/api/test_send_email", methods=["POST"])
@@ -217,20 +369,13 @@ def register(app):
             return _err("missing 'to' (or set DEFAULT_RECIPIENT in .env)", 400)
 
         try:
-            # Key: Use UTF-8 for subject and entire email
-            safe_subject = str(Header(subject, "utf-8"))
-            msg = Message(              #encapsulate an email message
-                subject=safe_subject,
-                recipients=[to_addr],
-                body=body,
-                sender=str(Header(app.config.get("MAIL_DEFAULT_SENDER"), "utf-8")),
-                charset="utf-8",
-            )
-
-            mail.send(msg)
-            return _ok({"sent": True, "to": to_addr})
+            # Queued only; UTF-8 subject/sender encoding happens when the outbox worker builds the message
+            row = enqueue([to_addr], subject, body, kind="test")
+            db.session.commit()
+            return _ok({"sent": True, "queued": True, "outbox_id": row.id, "to": to_addr})
         except Exception as e:
-            # Print complete error stack for easy error source location (email header issue)
+            db.session.rollback()
+            # Print complete error stack for easy error source location
             app.logger.exception("send_mail_failed")
             return jsonify({
                 "error": e.__class__.__name__,
@@ -246,13 +391,12 @@ def register(app):
         if not r:
             return _err("reminder not found", 404)
 
-        # Choose available audio (return DEFAULT if not uploaded, frontend uses built-in sound)
-        sound = None
-        for p in (r.media_paths or []):
-            if os.path.splitext(p)[1].lower() in {".mp3", ".wav", ".ogg"} and os.path.exists(p):
-                sound = p
-                break
-        return _ok({"sound": sound or "DEFAULT"})
+        # Resolved when media is attached (DEFAULT: nothing uploaded, frontend uses built-in sound)
+        if not r.alarm_sound:
+            return _ok({"sound": "DEFAULT", "url": None})
+        content_id = media_store.stored_content_id(r.alarm_sound)
+        return _ok({"sound": media_store.stored_path(app.config.get("UPLOAD_FOLDER", "uploads"), r.alarm_sound),
+                    "url": media_url(content_id) if content_id else None})
 
 
     @app.route("/api/test_send_email/<int:rid>", methods=["POST"])
@@ -267,45 +411,18 @@ def register(app):
         if not to_addr:
             return _err("missing recipient (set 'to' or 'recipient_email' or DEFAULT_RECIPIENT)", 400)
 
-        when = (r.scheduled_at.isoformat() if r.scheduled_at else "")
-        rep = ""
-        if r.repeat_rule and r.repeat_rule != "NONE":
-            rep = f"\nFrequency：{r.repeat_rule} x{r.repeat_interval}"
-
-        body_lines = []
-        if r.description:
-            body_lines.append(r.description)
-        if when:
-            body_lines.append(f"Time：{when}")
-        if rep:
-            body_lines.append(rep.strip())
-        if not body_lines:
-            body_lines.append("This is a reminder")
-
-        body_text = "\n".join(body_lines)
-
         try:
-            # Avoid 'ascii' error
-            safe_subject = str(Header(f"[Reminder] {r.title or 'Nontitle'}", "utf-8"))
-            msg = Message(
-                subject=safe_subject,
-                recipients=[to_addr],
-                body=body_text,
-                sender=app.config.get("MAIL_DEFAULT_SENDER"),
-                charset="utf-8",
-            )
-            msg.charset = "utf-8"
-
-            mail.send(msg)
-
-            # Optional: Write back send time
+            row = enqueue_reminder(r, to_addr)
+
+            # Optional: Write back send time (queued together with the email)
             r.last_sent_at = datetime.utcnow()
             db.session.commit()
-            return _ok({"sent": True, "to": to_addr})
+            list_cache.bump(current_user.id)
+            return _ok({"sent": True, "queued": True, "outbox_id": row.id, "to": to_addr})
         except Exception as e:
             db.session.rollback()
             app.logger.exception("send_mail_failed")
-            return jsonify({"error": e.__class__.__name__, "detail": str(e)}), 40
+            return jsonify({"error": e.__class__.__name__, "detail": str(e)}), 400
 
 
     # Handle OPTIONS (preflight) requests before formal POST requests
@@ -0,0 +1,245 @@
+# backend/routes/voice_upload.py
+# Chunked, resumable uploads for memory voice recordings: init -> append chunk at offset (repeat) -> finalize.
+# A dropped connection only loses the chunk in flight; the client asks for the committed offset and continues.
+from flask import request, jsonify, send_file
+from flask_login import login_required, current_user
+from backend.config import db
+from backend.cache import list_cache
+from backend.models.memory_model import Memories
+from backend.models.upload_model import UploadSession
+from sqlalchemy import and_, or_
+from datetime import datetime, timedelta
+import mimetypes, os, shutil, uuid
+
+CHUNK_SIZE = 1024 * 1024            # Advertised to clients; any size up to MAX_CONTENT_LENGTH is accepted
+COPY_BUFSIZE = 64 * 1024            # Request body is streamed to disk in blocks of this size
+VOICE_EXTENSIONS = {"mp3", "wav", "ogg", "webm", "m4a"}
+FINALIZE_LEASE = timedelta(minutes=5)   # A finalize claim this old is from a request that died
+
+def _ok(payload, status=200):
+    return jsonify(payload), status
+
+def _err(message, status=400):
+    return jsonify({"error": message}), status
+
+def _json():
+    return request.get_json(silent=True) or {}
+
+def voice_url(memory_id):
+    return f"/api/memories/{memory_id}/voice"
+
+def register(app):
+    def partial_dir():
+        folder = os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"), "partial")
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def part_path(session):
+        return os.path.join(partial_dir(), f"{session.id}.part")
+
+    def spool_path():
+        """Temp file for one incoming chunk; cas/tmp leftovers are removed by the media GC"""
+        folder = os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"), "cas", "tmp")
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, uuid.uuid4().hex)
+
+    def owned_session(upload_id):
+        return UploadSession.query.filter_by(id=upload_id, user_id=current_user.id).first()
+
+    def finalized(session):
+        payload = session.to_json()
+        payload["url"] = voice_url(session.memory_id) if session.memory_id else None
+        return payload
+
+    @app.route('/api/memory_uploads', methods=['POST'])
+    @login_required
+    def voice_upload_init():
+        """Start an upload: {"filename": "rec.webm", "size": 1234567, "memory_id": optional}"""
+        data = _json()
+        filename = (data.get("filename") or "").strip()
+        ext = os.path.splitext(filename)[1].lower().lstrip(".")
+        if not filename or ext not in VOICE_EXTENSIONS:
+            return _err("audio filename required (" + ", ".join(sorted(VOICE_EXTENSIONS)) + ")", 400)
+        try:
+            size = int(data.get("size"))
+        except (TypeError, ValueError):
+            return _err("size must be int", 400)
+        max_size = app.config.get("VOICE_UPLOAD_MAX", 100 * 1024 * 1024)
+        if size <= 0 or size > max_size:
+            return _err(f"size must be between 1 and {max_size} bytes", 413)
+
+        memory_id = data.get("memory_id")
+        if memory_id is not None and not Memories.query.filter_by(id=memory_id, user_id=current_user.id).first():
+            return _err("memory not found", 404)
+
+        session = UploadSession(id=uuid.uuid4().hex, user_id=current_user.id, memory_id=memory_id,
+                                filename=filename, total_size=size, committed_offset=0, status='OPEN')
+        try:
+            db.session.add(session)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return _err(str(e), 400)
+        open(part_path(session), "wb").close()
+
+        payload = session.to_json()
+        payload["chunk_size"] = CHUNK_SIZE
+        return _ok(payload, 201)
+
+    @app.route('/api/memory_uploads/<upload_id>', methods=['GET'])
+    @login_required
+    def voice_upload_status(upload_id):
+        """Resume point: the client re-sends from `offset`"""
+        session = owned_session(upload_id)
+        if not session:
+            return _err("upload not found", 404)
+        return _ok(session.to_json())
+
+    @app.route('/api/memory_uploads/<upload_id>', methods=['PUT'])
+    @login_required
+    def voice_upload_append(upload_id):
+        """Append raw bytes (application/octet-stream body) at ?offset=N, which must equal the committed offset"""
+        session = owned_session(upload_id)
+        if not session:
+            return _err("upload not found", 404)
+        if session.status != 'OPEN':
+            return _err("upload already finalized", 409)
+        offset = request.args.get("offset", type=int)
+        if offset != session.committed_offset:
+            # Lost a response or a chunk: tell the client where to continue
+            return jsonify({"error": "offset mismatch", "offset": session.committed_offset}), 409
+
+        # Spool the body first: the slow network read happens before anything is claimed or locked
+        remaining = session.total_size - offset
+        chunk_path = spool_path()
+        written = 0
+        try:
+            with open(chunk_path, "wb") as out:
+                while True:
+                    block = request.stream.read(COPY_BUFSIZE)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > remaining:
+                        return _err("chunk runs past the declared size", 413)
+                    out.write(block)
+
+            # Claim the offset before touching the part file: a concurrent append for the same offset matches no
+            # row here and leaves the bytes alone. The claim holds the row (SQLite: the write lock) until commit,
+            # so the bytes below are on disk before the offset that vouches for them becomes visible.
+            updated = UploadSession.query.filter_by(id=session.id, committed_offset=offset) \
+                .update({"committed_offset": offset + written, "updated_at": datetime.utcnow()},
+                        synchronize_session=False)
+            if not updated:
+                db.session.rollback()
+                db.session.refresh(session)
+                return jsonify({"error": "offset mismatch", "offset": session.committed_offset}), 409
+            try:
+                with open(chunk_path, "rb") as src, open(part_path(session), "r+b") as f:
+                    f.seek(offset)
+                    shutil.copyfileobj(src, f, COPY_BUFSIZE)
+                    f.truncate()                # Drop any tail left by an earlier interrupted chunk
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                db.session.rollback()
+                return _err(f"could not store chunk: {e}", 500)
+            db.session.commit()
+        finally:
+            try:
+                os.remove(chunk_path)
+            except OSError:
+                pass
+        return _ok({"upload_id": session.id, "offset": offset + written, "size": session.total_size})
+
+    @app.route('/api/memory_uploads/<upload_id>/finalize', methods=['POST'])
+    @login_required
+    def voice_upload_finalize(upload_id):
+        """Move the completed file into UPLOAD_FOLDER and attach it to the memory card (if one was given)"""
+        session = owned_session(upload_id)
+        if not session:
+            return _err("upload not found", 404)
+        # Claim the session the way append claims the offset: of two concurrent finalizes (or a retry while the
+        # first still runs) only one moves the file. A claim older than FINALIZE_LEASE belongs to a request that
+        # died and may be taken over.
+        stamp = datetime.utcnow()
+        claimed = UploadSession.query.filter(
+            UploadSession.id == session.id,
+            UploadSession.committed_offset == UploadSession.total_size,
+            or_(UploadSession.status == 'OPEN',
+                and_(UploadSession.status == 'FINALIZING', UploadSession.updated_at < stamp - FINALIZE_LEASE)),
+        ).update({"status": "FINALIZING", "updated_at": stamp}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            db.session.refresh(session)
+            if session.status == 'DONE':
+                return _ok(finalized(session))      # Idempotent: a retried finalize gets the same answer
+            if session.status == 'FINALIZING':
+                return _err("finalize in progress", 409)
+            return jsonify({"error": "upload incomplete", "offset": session.committed_offset}), 409
+
+        # Stored relative to UPLOAD_FOLDER (like the media store's paths) and served by voice_memory
+        ext = os.path.splitext(session.filename)[1].lower()
+        rel_path = f"{session.id}{ext}"
+        final_path = os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"), rel_path)
+        if os.path.exists(part_path(session)) or not os.path.exists(final_path):
+            os.replace(part_path(session), final_path)      # Else a taken-over claim: the file already moved
+
+        try:
+            session.status = 'DONE'
+            session.file_path = rel_path
+            if session.memory_id:
+                memory = Memories.query.filter_by(id=session.memory_id, user_id=current_user.id).first()
+                if memory:
+                    memory.voice_file_path = rel_path
+                    memory.updated_at = datetime.utcnow()
+            db.session.commit()
+            list_cache.bump(current_user.id)
+        except Exception as e:
+            db.session.rollback()
+            os.replace(final_path, part_path(session))      # Keep the bytes so finalize can be retried
+            UploadSession.query.filter_by(id=session.id, status='FINALIZING') \
+                .update({"status": "OPEN"}, synchronize_session=False)
+            db.session.commit()
+            return _err(str(e), 400)
+
+        return _ok(finalized(session))
+
+    @app.route('/api/memories/<int:memory_id>/voice', methods=['GET'])
+    @login_required
+    def voice_memory(memory_id):
+        """Stream the card's voice recording (Range for seeking, ETag/If-None-Match, X-Sendfile like /api/media).
+        Recordings are top-level files of UPLOAD_FOLDER: only the file name of voice_file_path is used, so absolute
+        paths written before it was stored relative still resolve and a client-set value can't point elsewhere."""
+        memory = Memories.query.filter_by(id=memory_id, user_id=current_user.id).first()
+        if not memory or not memory.voice_file_path:
+            return _err("voice recording not found", 404)
+        name = os.path.basename(os.path.normpath(memory.voice_file_path))
+        path = os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"), name)
+        if name in ("", ".", "..") or not os.path.isfile(path):
+            return _err("voice file missing", 404)
+        response = send_file(path, mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                             conditional=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True      # The card may get a new recording under the same URL
+        return response
+
+    @app.route('/api/memory_uploads/<upload_id>', methods=['DELETE'])
+    @login_required
+    def voice_upload_abort(upload_id):
+        session = owned_session(upload_id)
+        if not session:
+            return _err("upload not found", 404)
+        if session.status != 'OPEN':
+            return _err("upload already finalized", 409)
+        try:
+            db.session.delete(session)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return _err(str(e), 400)
+        try:
+            os.remove(part_path(session))
+        except OSError:
+            pass
+        return _ok({"message": "deleted"})
@@ -0,0 +1,22 @@
+# scripts/backfill_quiz_stats.py
+# Rebuild the quiz progress rollups (quiz_user_stats, quiz_question_stats) from quiz_attempts and wrong_questions,
+# a batch of users per transaction. Safe to re-run; run it once after upgrading, ideally while nobody submits.
+#   python -m backend.scripts.backfill_quiz_stats [--batch 200]
+from backend.config import create_app
+from backend.quiz_stats import rebuild
+
+
+def main(batch):
+    app = create_app()
+    with app.app_context():
+        users, questions = rebuild(batch_size=batch, log=print)
+    print(f"Rebuilt {users} user rollups, backfilled {questions} question rollups.")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--batch', type=int, default=200, help='users per transaction')
+    args = ap.parse_args()
+    main(args.batch)
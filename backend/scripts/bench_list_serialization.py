@@ -0,0 +1,70 @@
+# scripts/bench_list_serialization.py
+# Micro-benchmark: ORM to_json()+json encoding vs. column projection + backend.serializers for list endpoints.
+# Runs against a throw-away in-memory SQLite database, the app database is not touched.
+import json, time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from backend.config import db
+from backend.models.user_model import User
+from backend.models.memory_model import Memories
+from backend.serializers import dumps, project, rows_to_json, orjson
+
+
+def build(n):
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, Memories.__table__])
+    session = Session(engine)
+    session.add(User(id=1, email="bench@example.com", pin_failed=0))
+    now = datetime.utcnow()
+    session.execute(Memories.__table__.insert(), [{
+        "user_id": 1, "title": f"Memory {i}", "content": "We walked by the lake and talked about the old house. " * 4,
+        "tags": ["family", "lake"], "created_at": now - timedelta(minutes=i), "updated_at": now,
+        "is_favorite": i % 7 == 0, "voice_file_path": None,
+    } for i in range(n)])
+    session.commit()
+    return session
+
+
+def orm_path(session):
+    rows = session.query(Memories).filter_by(user_id=1).order_by(Memories.created_at.desc()).all()
+    # jsonify() defaults: sorted keys, stdlib encoder
+    return json.dumps({"ok": True, "data": [m.to_json() for m in rows]}, sort_keys=True).encode()
+
+
+def projection_path(session):
+    q = session.query(Memories).filter_by(user_id=1).order_by(Memories.created_at.desc())
+    return dumps({"ok": True, "data": rows_to_json(project(q, Memories).all(), Memories)})
+
+
+def best_of(fn, session, repeat):
+    best = None
+    for _ in range(repeat):
+        session.expunge_all()       # Cold identity map each run, like a fresh request
+        t0 = time.perf_counter()
+        fn(session)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main(sizes, repeat):
+    print(f"encoder: {'orjson' if orjson else 'stdlib json'}")
+    print(f"{'rows':>8} {'orm+to_json':>14} {'projection':>14} {'speedup':>8}")
+    for n in sizes:
+        session = build(n)
+        assert json.loads(orm_path(session)) == json.loads(projection_path(session))
+        a = best_of(orm_path, session, repeat)
+        b = best_of(projection_path, session, repeat)
+        print(f"{n:>8} {a * 1000:>12.1f}ms {b * 1000:>12.1f}ms {a / b:>7.1f}x")
+        session.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', default='1000,10000,100000', help='comma separated row counts')
+    ap.add_argument('--repeat', type=int, default=3, help='runs per size, best is reported')
+    args = ap.parse_args()
+    main([int(x) for x in args.sizes.split(',')], args.repeat)
@@ -0,0 +1,95 @@
+# scripts/build_media_derivatives.py
+# Render thumbnail/display copies for every stored image and record them on the reminders that use it.
+# Idempotent: finished derivatives are skipped, so it can be re-run (or cron'ed) over the uploads folder at will.
+# Reminders are matched in one pass over the table (sync_reminders), not one media_paths search per image.
+#
+# Limitation: only content-addressed blobs (media_blobs rows) are covered. Legacy flat uploads, which media_paths
+# still names by absolute path, get no thumb/display copies: nothing serves derivatives for them (/api/media only
+# takes content ids), so they are reported as skipped. Re-uploading such a file moves it into the store.
+#   python -m backend.scripts.build_media_derivatives [--workers 4] [--dry-run]
+from backend.config import create_app, db
+from backend.models.media_model import MediaBlob
+from backend.models.reminder_model import Reminder
+from backend.media_derivatives import render, is_image, derived_rel_path, IMAGE_EXTS, SIZES
+from backend import media_store
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing, os
+
+
+def render_all(app, workers, in_flight):
+    """Render missing derivatives for all image blobs -> set of content ids that have a full set"""
+    folder = app.config.get("UPLOAD_FOLDER", "uploads")
+    done, failed = set(), 0
+    blobs = MediaBlob.query.order_by(MediaBlob.sha256).yield_per(500)
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = {}
+
+        def drain(block):
+            nonlocal failed
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED) if block else (
+                [f for f in pending if f.done()], None)
+            for f in finished:
+                content_id = pending.pop(f)
+                try:
+                    f.result()
+                    done.add(content_id)
+                except Exception as e:
+                    failed += 1
+                    print(f"{content_id}: {e.__class__.__name__}: {e}")
+
+        for blob in blobs:
+            if not is_image(blob):
+                continue
+            src = media_store.blob_path(folder, blob)
+            if not os.path.exists(src):
+                continue
+            pending[pool.submit(render, src, folder, blob.sha256)] = blob.sha256
+            while len(pending) >= in_flight:        # Bounded: the blob table is streamed, not queued up front
+                drain(block=True)
+        while pending:
+            drain(block=True)
+    return done, failed
+
+
+def sync_reminders(done, dry_run):
+    """Make media_derivatives match the rendered images for every reminder
+    -> (reminders changed, legacy image paths skipped)"""
+    changed = legacy = 0
+    for r in Reminder.query.filter(Reminder.media_paths.isnot(None)).order_by(Reminder.rid).yield_per(500):
+        legacy += sum(1 for p in r.media_paths or [] if not media_store.is_content_id(p)
+                      and os.path.splitext(str(p))[1].lower() in IMAGE_EXTS)
+        wanted = {cid: {size: derived_rel_path(cid, size) for size in SIZES}
+                  for cid in (r.media_paths or []) if cid in done}
+        if (r.media_derivatives or {}) != wanted:
+            changed += 1
+            if not dry_run:
+                r.media_derivatives = wanted or None
+    if not dry_run:
+        db.session.commit()
+    return changed, legacy
+
+
+def main(workers, in_flight, dry_run):
+    app = create_app()
+    with app.app_context():
+        if dry_run:
+            done = {b.sha256 for b in MediaBlob.query.yield_per(500) if is_image(b) and all(
+                os.path.exists(os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"),
+                                            *derived_rel_path(b.sha256, s).split("/"))) for s in SIZES)}
+            failed = 0
+        else:
+            done, failed = render_all(app, workers, in_flight)
+        changed, legacy = sync_reminders(done, dry_run)
+    print(f"{len(done)} images with derivatives, {failed} failed, {changed} reminders "
+          f"{'would be ' if dry_run else ''}updated, {legacy} legacy image paths skipped (not in the media store).")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='render processes')
+    ap.add_argument('--in-flight', type=int, default=64, help='max images queued to the pool at once')
+    ap.add_argument('--dry-run', action='store_true', help='only report which reminders are out of date')
+    args = ap.parse_args()
+    main(args.workers, args.in_flight, args.dry_run)
@@ -0,0 +1,43 @@
+# scripts/import_reminders.py
+# Bulk-import a clinic's medication plan for one user from CSV or iCalendar (see backend/reminder_import.py):
+#   python -m backend.scripts.import_reminders plan.csv --email patient@example.com [--channels alarm,email]
+from backend.config import create_app
+from backend.models.user_model import User
+from backend.reminder_import import import_reminders, detect_format, READERS, CHUNK_SIZE
+from backend.cache import list_cache
+from backend.dispatcher import now
+
+
+def main(path, email, fmt, channels, chunk):
+    app = create_app()
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise SystemExit("cannot tell the format from the file name, pass --format csv|ics")
+    with app.app_context():
+        user = User.query.filter_by(email=email.strip().lower()).first()
+        if not user:
+            raise SystemExit(f"no user with email {email}")
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            report = import_reminders(READERS[fmt](f), user.id, now(), default_channels=channels, chunk_size=chunk)
+        list_cache.bump(user.id)
+
+    for e in report["errors"]:
+        print(f"line {e['line']}: {e['error']}")
+    if report["errors_truncated"]:
+        print("(more errors not shown)")
+    if "error" in report:
+        print(f"stopped early: {report['error']}")
+    print(f"Imported {report['imported']} reminders, {report['failed']} rows failed.")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('path', help='.csv or .ics file')
+    ap.add_argument('--email', required=True, help='owner of the imported reminders')
+    ap.add_argument('--format', choices=sorted(READERS), default=None, help='default: from the file extension')
+    ap.add_argument('--channels', default='alarm', help='channels for rows that name none (comma separated)')
+    ap.add_argument('--chunk', type=int, default=CHUNK_SIZE, help='rows per INSERT/commit')
+    args = ap.parse_args()
+    main(args.path, args.email, args.format, [c.strip() for c in args.channels.split(",") if c.strip()], args.chunk)
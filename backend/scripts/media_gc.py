@@ -0,0 +1,36 @@
+# scripts/media_gc.py
+# Remove uploaded files that no reminder, memory card or open upload refers to any more (see backend/media_gc.py).
+#   python -m backend.scripts.media_gc --dry-run              # report only
+#   python -m backend.scripts.media_gc [--rate 200] [--min-age-hours 24]
+#   python -m backend.scripts.media_gc --every 360            # scheduled: one pass every 6 hours
+# or from cron:  0 3 * * *  cd /srv/app && python -m backend.scripts.media_gc --rate 200
+from backend.config import create_app
+from backend.media_gc import collect, format_report
+from datetime import timedelta
+import json, time
+
+
+def main(dry_run, min_age_hours, batch, rate, every, as_json):
+    app = create_app()
+    while True:
+        with app.app_context():
+            report = collect(app.config.get("UPLOAD_FOLDER", "uploads"), min_age=timedelta(hours=min_age_hours),
+                             dry_run=dry_run, batch_size=batch, rate=rate)
+        print(json.dumps(report) if as_json else format_report(report), flush=True)
+        if not every:
+            return
+        time.sleep(every * 60)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--dry-run', action='store_true', help='report what would be removed, touch nothing')
+    ap.add_argument('--min-age-hours', type=float, default=24.0, help='never remove files younger than this')
+    ap.add_argument('--batch', type=int, default=1000, help='rows per insert/query while scanning and deleting')
+    ap.add_argument('--rate', type=float, default=0.0, help='max files deleted per second (0 = unlimited)')
+    ap.add_argument('--every', type=float, default=0.0, help='keep running, one pass every N minutes')
+    ap.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = ap.parse_args()
+    main(args.dry_run, args.min_age_hours, args.batch, args.rate, args.every, args.json)
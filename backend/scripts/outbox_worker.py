@@ -0,0 +1,39 @@
+# scripts/outbox_worker.py
+# Delivers queued emails (PIN codes, reminders, tests); start one or more next to the web server:
+#   python -m backend.scripts.outbox_worker [--batch 100] [--interval 2] [--once]
+# Against a local SMTP stand-in:
+#   python -m aiosmtpd -n -l localhost:1025 &
+#   MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=False SENDER_APP_PASSWORD= python -m backend.scripts.outbox_worker --once
+from backend.config import create_app, db
+from backend.models.outbox_model import EmailOutbox
+from backend.outbox import run
+
+
+def print_stats(app):
+    with app.app_context():
+        rows = db.session.query(EmailOutbox.status, db.func.count()).group_by(EmailOutbox.status).all()
+        for status, n in sorted(rows):
+            print(f"{status:8} {n}")
+
+
+def main(worker_id, batch, interval, once, stats):
+    app = create_app()
+    if stats:
+        print_stats(app)
+        return
+    n = run(app, worker_id=worker_id, batch_size=batch, poll_interval=interval, once=once)
+    if once:
+        print(f"Processed {n} emails.")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--worker-id', default=None, help='lease owner name (default: host:pid:random)')
+    ap.add_argument('--batch', type=int, default=100, help='emails sent per SMTP session')
+    ap.add_argument('--interval', type=float, default=2.0, help='seconds to sleep when nothing is ready')
+    ap.add_argument('--once', action='store_true', help='drain what is ready now and exit (cron mode)')
+    ap.add_argument('--stats', action='store_true', help='print message counts per status and exit')
+    args = ap.parse_args()
+    main(args.worker_id, args.batch, args.interval, args.once, args.stats)
@@ -0,0 +1,24 @@
+# scripts/reminder_dispatcher.py
+# Background worker that fires due reminders; start one or more next to the web server:
+#   python -m backend.scripts.reminder_dispatcher [--batch 500] [--interval 5] [--once]
+from backend.config import create_app
+from backend.dispatcher import run
+
+
+def main(worker_id, batch, interval, once):
+    app = create_app()
+    n = run(app, worker_id=worker_id, batch_size=batch, poll_interval=interval, once=once)
+    if once:
+        print(f"Dispatched {n} reminders.")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--worker-id', default=None, help='lease owner name (default: host:pid:random)')
+    ap.add_argument('--batch', type=int, default=500, help='reminders claimed per round trip')
+    ap.add_argument('--interval', type=float, default=5.0, help='seconds to sleep when nothing is due')
+    ap.add_argument('--once', action='store_true', help='drain what is due now and exit (cron mode)')
+    args = ap.parse_args()
+    main(args.worker_id, args.batch, args.interval, args.once)
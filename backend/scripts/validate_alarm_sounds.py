@@ -0,0 +1,69 @@
+# scripts/validate_alarm_sounds.py
+# Re-resolve Reminder.alarm_sound for every reminder with media: fills it in after the upgrade and repairs entries
+# whose file went missing. Reminders are read in rid order, `--batch` at a time; each batch costs one MediaBlob
+# lookup, one stat per distinct candidate file and one executemany for the rows that changed.
+#   python -m backend.scripts.validate_alarm_sounds [--batch 500] [--dry-run]
+from backend.config import create_app, db
+from backend.models.media_model import MediaBlob
+from backend.models.reminder_model import Reminder
+from backend import media_store
+from sqlalchemy import select, update
+import os
+
+MAX_CACHED_PATHS = 100_000
+
+
+def sweep(upload_root, batch_size, dry_run):
+    """-> (reminders checked, reminders changed)"""
+    checked = changed = 0
+    present = {}                        # path -> exists; shared blobs are only stat'ed once
+
+    def exists(path):
+        if path not in present:
+            if len(present) >= MAX_CACHED_PATHS:
+                present.clear()
+            present[path] = os.path.exists(path)
+        return present[path]
+
+    last_rid = 0
+    while True:
+        rows = db.session.execute(
+            select(Reminder.rid, Reminder.media_paths, Reminder.alarm_sound, Reminder.updated_at)
+            .where(Reminder.rid > last_rid).order_by(Reminder.rid).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_rid = rows[-1].rid
+        ids = {ref for row in rows for ref in row.media_paths or [] if media_store.is_content_id(ref)}
+        blobs = {b.sha256: b for b in MediaBlob.query.filter(MediaBlob.sha256.in_(ids)).all()} if ids else {}
+
+        updates = []
+        for row in rows:
+            checked += 1
+            sound = media_store.pick_alarm_sound(row.media_paths, blobs, upload_root, exists)
+            if sound != row.alarm_sound:
+                # Not a user-visible edit: keep updated_at so list caches and streams are left alone
+                updates.append({"rid": row.rid, "alarm_sound": sound, "updated_at": row.updated_at})
+        changed += len(updates)
+        if updates and not dry_run:
+            db.session.execute(update(Reminder), updates)       # ORM bulk UPDATE by primary key
+            db.session.commit()
+        db.session.expunge_all()
+    return checked, changed
+
+
+def main(batch_size, dry_run):
+    app = create_app()
+    with app.app_context():
+        checked, changed = sweep(app.config.get("UPLOAD_FOLDER", "uploads"), batch_size, dry_run)
+    print(f"{checked} reminders checked, {changed} alarm sounds {'would be ' if dry_run else ''}updated.")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--batch', type=int, default=500, help='reminders per query/update')
+    ap.add_argument('--dry-run', action='store_true', help='only report how many entries are stale')
+    args = ap.parse_args()
+    main(args.batch, args.dry_run)
@@ -0,0 +1,42 @@
+# ORM-free serialization for list endpoints: select plain column tuples and encode them in one pass,
+# instead of hydrating a model instance per row and calling to_json()/isoformat() on each.
+import json
+from datetime import date
+
+try:
+    import orjson       # Optional: C encoder, handles datetime natively
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """payload -> UTF-8 JSON bytes (datetimes as ISO 8601, same as to_json())"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def project(query, model):
+    """Narrow an ORM query to the model's json_columns; rows come back as tuples, not instances"""
+    return query.with_entities(*[getattr(model, c) for c in model.json_columns])
+
+
+def rows_to_json(rows, model):
+    """Column tuples -> list of dicts shaped like model.to_json() (json_defaults replace empty values)"""
+    keys = model.json_columns
+    defaults = list(model.json_defaults.items())
+    out = []
+    append = out.append
+    for row in rows:
+        item = dict(zip(keys, row))
+        for k, d in defaults:
+            if not item[k]:
+                item[k] = d
+        append(item)
+    return out
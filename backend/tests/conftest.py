@@ -0,0 +1,34 @@
+import pytest
+from backend.config import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user(app):
+    from backend.models.user_model import User
+    with app.app_context():
+        u = User(email="patient@example.com")
+        db.session.add(u)
+        db.session.commit()
+        return u.id
+
+
+@pytest.fixture
+def client(app, user):
+    c = app.test_client()
+    c.get(f"/dev/login_as/{user}")
+    return c
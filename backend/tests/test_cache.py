@@ -0,0 +1,23 @@
+# A payload built before a write is bumped must not be stored under the version that follows the write
+from backend.cache import ListCache
+
+
+def test_put_after_concurrent_bump_is_dropped():
+    cache = ListCache(max_entries=8, ttl=30)
+    assert cache.get(1, "list") is None             # Miss: the request goes to the database
+    version = cache.version(1)
+    cache.bump(1)                                   # Another request commits a write meanwhile
+    cache.put(1, "list", "stale", version)
+    assert cache.get(1, "list") is None
+
+    version = cache.version(1)
+    cache.put(1, "list", "fresh", version)
+    assert cache.get(1, "list") == "fresh"
+
+
+def test_bump_of_another_user_does_not_drop_the_put():
+    cache = ListCache(max_entries=8, ttl=30)
+    version = cache.version(1)
+    cache.bump(2)
+    cache.put(1, "list", "fresh", version)
+    assert cache.get(1, "list") == "fresh"
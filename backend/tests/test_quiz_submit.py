@@ -0,0 +1,87 @@
+# quiz_submit must cost the same number of statements whatever the quiz length (no per-answer queries/inserts)
+from contextlib import contextmanager
+from sqlalchemy import event
+from backend.config import db
+from backend.models.quiz_model import QuizQuestion, QuizUserStats, WrongQuestion
+from backend.quiz_bank import question_bank
+
+
+@contextmanager
+def statements(app):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((" ".join(statement.split()), executemany))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _seed(app, n=30):
+    with app.app_context():
+        db.session.add_all(QuizQuestion(text=f"Q{i}", options=["a", "b", "c"], answer_index=0) for i in range(n))
+        db.session.commit()
+
+
+def _submit(app, client, count, wrong_every=2):
+    quiz = client.get(f"/api/create_quiz?count={count}").get_json()
+    answers = [{"question_id": q["qid"], "selected_index": 1 if i % wrong_every == 0 else 0}
+               for i, q in enumerate(quiz["questions"])]
+    question_bank.invalidate()          # Cold bank: the submit has to load it
+    with statements(app) as seen:
+        r = client.post("/api/submit_quiz", json={"attempt_id": quiz["attempt_id"], "answers": answers})
+    assert r.status_code == 200, r.get_json()
+    return r.get_json(), seen
+
+
+def test_submit_uses_one_bank_select_and_one_executemany(app, client):
+    _seed(app)
+    result, seen = _submit(app, client, 10)
+    assert result == {"score": 5, "total": 10}
+
+    bank_selects = [s for s, _ in seen if s.startswith("SELECT") and "FROM quiz_questions" in s]
+    assert len(bank_selects) == 1
+
+    wrong_inserts = [(s, many) for s, many in seen if s.startswith("INSERT INTO wrong_questions")]
+    assert len(wrong_inserts) == 1
+    assert wrong_inserts[0][1] is True      # All five misses in one executemany
+    with app.app_context():
+        assert WrongQuestion.query.count() == 5
+
+
+def test_statement_count_does_not_grow_with_quiz_length(app, client):
+    _seed(app)
+    _, short = _submit(app, client, 4)
+    _, long = _submit(app, client, 20)
+    assert len(short) == len(long)
+
+
+def test_resubmit_is_rejected_without_writing_twice(app, client, user):
+    _seed(app)
+    quiz = client.get("/api/create_quiz?count=4").get_json()
+    answers = [{"question_id": q["qid"], "selected_index": 1} for q in quiz["questions"]]
+    body = {"attempt_id": quiz["attempt_id"], "answers": answers}
+    assert client.post("/api/submit_quiz", json=body).status_code == 200
+    r = client.post("/api/submit_quiz", json=body)
+    assert r.status_code == 409
+    with app.app_context():
+        assert WrongQuestion.query.count() == 4
+        assert db.session.get(QuizUserStats, user).answered == 4
+
+
+def test_repeated_question_counts_once(app, client, user):
+    _seed(app)
+    quiz = client.get("/api/create_quiz?count=2").get_json()
+    first, second = (q["qid"] for q in quiz["questions"])
+    answers = [{"question_id": first, "selected_index": 1}, {"question_id": first, "selected_index": 0},
+               {"question_id": second, "selected_index": 1}]
+    r = client.post("/api/submit_quiz", json={"attempt_id": quiz["attempt_id"], "answers": answers})
+    assert r.get_json() == {"score": 1, "total": 2}
+    with app.app_context():
+        assert db.session.get(QuizUserStats, user).answered == 2
+        assert [w.qid for w in WrongQuestion.query.all()] == [second]
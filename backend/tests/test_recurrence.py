@@ -0,0 +1,34 @@
+# COUNT must end the series at the same occurrence whichever window the expansion starts from
+from datetime import datetime, timezone
+from backend.recurrence import Recurrence, rule_fields
+
+
+def test_count_with_colliding_positive_and_negative_monthdays():
+    # In 31-day months the 15th and the 17th-from-last are the same day and fire once
+    rule = Recurrence(datetime(2026, 1, 1, 9, 0), "MONTHLY", monthdays=[15, -17], count=10)
+    series = list(rule.between(rule.start))
+    assert len(series) == 10
+    last = series[-1]
+    assert list(rule.between(datetime(2026, 9, 1))) == [t for t in series if t >= datetime(2026, 9, 1)]
+    assert rule.after(last) is None
+
+
+def test_count_matches_full_expansion_from_any_month():
+    rule = Recurrence(datetime(2026, 1, 20, 8, 0), "MONTHLY", monthdays=[1, 15, -1], times=["08:00", "20:00"],
+                      count=25)
+    series = list(rule.between(rule.start))
+    assert len(series) == 25
+    for month in range(2, 13):
+        lo = datetime(2026, month, 1)
+        assert list(rule.between(lo)) == [t for t in series if t >= lo]
+
+
+def test_utc_until_is_read_as_local_time():
+    local = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    fields, error = rule_fields({"rrule": "FREQ=DAILY;UNTIL=20260301T120000Z"})
+    assert error is None
+    assert fields["repeat_until"] == local
+    fields, _ = rule_fields({"repeat_rule": "DAILY", "repeat_until": "2026-03-01T12:00:00+00:00"})
+    assert fields["repeat_until"] == local
+    fields, _ = rule_fields({"repeat_rule": "DAILY", "repeat_until": "2026-03-01T12:00:00"})
+    assert fields["repeat_until"] == datetime(2026, 3, 1, 12, 0)        # Already local wall-clock time
@@ -1,13 +1,22 @@
 // src/pages/WrongBook.jsx
 import { useEffect, useState } from 'react';
 import { fetchWrong } from '../../services/quizService';
-import { Box, Card, CardContent, Typography } from '@mui/material';
+import { Box, Button, Card, CardContent, Typography } from '@mui/material';
 
 export default function WrongBook() {
   const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
+
+  const load = (after) =>
+    fetchWrong(after)
+      .then((page) => {
+        setItems((prev) => (after ? prev.concat(page.data || []) : page.data || []));
+        setCursor(page.next_cursor || null);
+      })
+      .catch(() => alert('Please log in first.'));
 
   useEffect(() => {
-    fetchWrong().then(setItems).catch(() => alert('Please log in first.'));
+    load(null);
   }, []);
 
   return (
@@ -21,7 +30,7 @@ export default function WrongBook() {
       {(items || []).map((w) => (
         <Card key={w.id || `${w.attempt_id}-${w.question_id}`} sx={{ mb: 2.5, borderRadius: '18px' }}>
           <CardContent sx={{ p: 3 }}>
-            <Typography sx={{ fontWeight: 600, mb: 1.2 }}>{w.question_text}</Typography>
+            <Typography sx={{ fontWeight: 600, mb: 1.2 }}>{w.text || w.question_text}</Typography>
             <ol style={{ paddingLeft: 18, marginTop: 6 }}>
               {w.options.map((opt, i) => (
                 <li key={i} style={{ margin: '4px 0' }}>
@@ -32,6 +41,9 @@ export default function WrongBook() {
             <Typography sx={{ mt: 1, color: '#2e7d32', fontWeight: 600 }}>
               Correct answer: #{w.correct_index}
             </Typography>
+            {w.misses > 1 && (
+              <Typography sx={{ mt: .5, color: '#888' }}>Missed {w.misses} times</Typography>
+            )}
             {w.explanation && <Typography sx={{ mt: .5, color: '#555' }}>{w.explanation}</Typography>}
             {w.source_url && (
               <a href={w.source_url} target="_blank" rel="noreferrer">source</a>
@@ -39,6 +51,10 @@ export default function WrongBook() {
           </CardContent>
         </Card>
       ))}
+
+      {cursor && (
+        <Button variant="outlined" onClick={() => load(cursor)}>Load more</Button>
+      )}
     </Box>
   );
 }
\ No newline at end of file
@@ -21,4 +21,6 @@ async function post(url, body) {
 export const createQuiz = (count = 5) => get(`/api/create_quiz?count=${count}`);
 export const checkQuiz  = (qid, selected_index) => post('/api/check_quiz', { question_id: qid, selected_index });
 export const submitQuiz = (attempt_id, answers) => post('/api/submit_quiz', { attempt_id, answers });
-export const fetchWrong = () => get('/api/wrong_quiz');
+// One card per missed question (latest miss, miss count), newest first; pass next_cursor for the next page
+export const fetchWrong = (cursor) =>
+  get(`/api/wrong_quiz?group=qid&limit=20${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`);
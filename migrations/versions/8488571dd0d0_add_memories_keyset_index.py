@@ -0,0 +1,28 @@
+"""add memories keyset index
+
+Revision ID: 8488571dd0d0
+Revises: 1cce2821ff3b
+Create Date: 2026-10-17 09:12:41.530114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8488571dd0d0'
+down_revision = '1cce2821ff3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (user_id, created_at DESC, id) serves the get_memory cursor without a sort step
+    with op.batch_alter_table('memories', schema=None) as batch_op:
+        batch_op.create_index('ix_memories_user_id_created_at_id',
+                              ['user_id', sa.text('created_at DESC'), 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('memories', schema=None) as batch_op:
+        batch_op.drop_index('ix_memories_user_id_created_at_id')
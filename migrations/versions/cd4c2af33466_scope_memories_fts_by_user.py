@@ -0,0 +1,66 @@
+"""scope memories fts index by user
+
+Revision ID: cd4c2af33466
+Revises: 46d0ecfb82cf
+Create Date: 2026-10-17 23:58:31.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd4c2af33466'
+down_revision = '46d0ecfb82cf'
+branch_labels = None
+depends_on = None
+
+
+# user_id becomes a fourth, tokenized column of the external-content FTS5 table: search ANDs "user_id:<id>" into
+# the MATCH, so FTS5 intersects with that user's posting list instead of ranking every user's hits and then
+# discarding them in the join.
+# NOTE: a batch_alter_table that recreates "memories" drops these triggers -> re-run them after such a migration.
+def _fts_sql(columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        "DROP TRIGGER IF EXISTS memories_fts_au",
+        "DROP TRIGGER IF EXISTS memories_fts_ad",
+        "DROP TRIGGER IF EXISTS memories_fts_ai",
+        "DROP TABLE IF EXISTS memories_fts",
+        f"""
+        CREATE VIRTUAL TABLE memories_fts USING fts5(
+            {cols},
+            content='memories', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER memories_fts_ai AFTER INSERT ON memories BEGIN
+            INSERT INTO memories_fts(rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+        f"""
+        CREATE TRIGGER memories_fts_ad AFTER DELETE ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, {cols}) VALUES ('delete', old.id, {old});
+        END
+        """,
+        f"""
+        CREATE TRIGGER memories_fts_au AFTER UPDATE OF {cols} ON memories BEGIN
+            INSERT INTO memories_fts(memories_fts, rowid, {cols}) VALUES ('delete', old.id, {old});
+            INSERT INTO memories_fts(rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+        "INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')",
+    ]
+
+
+def upgrade():
+    for stmt in _fts_sql(["title", "content", "tags", "user_id"]):
+        op.execute(stmt)
+
+
+def downgrade():
+    for stmt in _fts_sql(["title", "content", "tags"]):
+        op.execute(stmt)
@@ -0,0 +1,85 @@
+"""add reminder alarm_sound
+
+Revision ID: e842e3f39414
+Revises: ec03d8be4e73
+Create Date: 2026-10-17 20:05:42.318570
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+import os, re
+
+
+# revision identifiers, used by Alembic.
+revision = 'e842e3f39414'
+down_revision = 'ec03d8be4e73'
+branch_labels = None
+depends_on = None
+
+
+# Backfill: the first audio attachment whose file is present, as media_store.pick_alarm_sound picks it
+# (store-relative path for blobs, the stored absolute path for legacy uploads). Inlined so the migration does not
+# depend on how the models look later; backend.scripts.validate_alarm_sounds repairs the same column afterwards.
+AUDIO_EXTS = {".mp3", ".wav", ".ogg"}
+BATCH = 500
+_CONTENT_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+reminders = sa.table('reminders', sa.column('rid', sa.Integer), sa.column('media_paths', sa.JSON),
+                     sa.column('alarm_sound', sa.String))
+media_blobs = sa.table('media_blobs', sa.column('sha256', sa.String), sa.column('ext', sa.String))
+
+
+def _pick(refs, exts, upload_root):
+    for ref in refs or []:
+        if not isinstance(ref, str):
+            continue
+        if _CONTENT_ID_RE.match(ref):
+            if ref not in exts:
+                continue                # Blob row is gone
+            stored = f"cas/{ref[:2]}/{ref[2:4]}/{ref}{exts[ref]}"
+            path = os.path.join(upload_root, *stored.split("/"))
+        else:
+            stored = path = ref
+        if os.path.splitext(stored)[1].lower() in AUDIO_EXTS and os.path.exists(path):
+            return stored
+    return None
+
+
+def _backfill():
+    conn = op.get_bind()
+    upload_root = current_app.config.get("UPLOAD_FOLDER", "uploads")
+    last_rid = 0
+    while True:
+        rows = conn.execute(sa.select(reminders.c.rid, reminders.c.media_paths)
+                            .where(reminders.c.rid > last_rid, reminders.c.media_paths.isnot(None))
+                            .order_by(reminders.c.rid).limit(BATCH)).all()
+        if not rows:
+            return
+        last_rid = rows[-1].rid
+        ids = {ref for row in rows for ref in row.media_paths or []
+               if isinstance(ref, str) and _CONTENT_ID_RE.match(ref)}
+        exts = dict(conn.execute(sa.select(media_blobs.c.sha256, media_blobs.c.ext)
+                                 .where(media_blobs.c.sha256.in_(ids))).all()) if ids else {}
+        updates = [{"b_rid": row.rid, "sound": sound} for row in rows
+                   if (sound := _pick(row.media_paths, exts, upload_root))]
+        if updates:
+            conn.execute(reminders.update().where(reminders.c.rid == sa.bindparam("b_rid"))
+                         .values(alarm_sound=sa.bindparam("sound")), updates)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('alarm_sound', sa.String(length=512), nullable=True))
+
+    # ### end Alembic commands ###
+    _backfill()
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.drop_column('alarm_sound')
+
+    # ### end Alembic commands ###
@@ -0,0 +1,68 @@
+"""add memories fts5 index
+
+Revision ID: ef9753884700
+Revises: 8488571dd0d0
+Create Date: 2026-10-17 10:41:07.218455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef9753884700'
+down_revision = '8488571dd0d0'
+branch_labels = None
+depends_on = None
+
+
+# External-content FTS5 table: stores only the inverted index, text stays in memories.
+# NOTE: a batch_alter_table that recreates "memories" drops these triggers -> re-run them after such a migration.
+UPGRADE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        title, content, tags,
+        content='memories', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts(rowid, title, content, tags)
+        VALUES (new.id, new.title, new.content, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF title, content, tags ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+        INSERT INTO memories_fts(rowid, title, content, tags)
+        VALUES (new.id, new.title, new.content, new.tags);
+    END
+    """,
+    # Index rows that existed before the triggers
+    "INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')",
+]
+
+DOWNGRADE_SQL = [
+    "DROP TRIGGER IF EXISTS memories_fts_au",
+    "DROP TRIGGER IF EXISTS memories_fts_ad",
+    "DROP TRIGGER IF EXISTS memories_fts_ai",
+    "DROP TABLE IF EXISTS memories_fts",
+]
+
+
+def upgrade():
+    for stmt in UPGRADE_SQL:
+        op.execute(stmt)
+
+
+def downgrade():
+    for stmt in DOWNGRADE_SQL:
+        op.execute(stmt)